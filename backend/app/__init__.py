@@ -2,18 +2,19 @@ from flask import Flask, redirect
 from flask_cors import CORS
 from flask_dance.contrib.github import make_github_blueprint
 from .config import Config
+from .middlewares.metrics_middleware import init_request_metrics
 
 
 def create_app():
-    import nltk
-    nltk.download('punkt')
-    nltk.download('punkt_tab')
-    nltk.download('averaged_perceptron_tagger')
-    nltk.download('averaged_perceptron_tagger_eng')
-
     app = Flask(__name__)
     CORS(app)
     app.config.from_object(Config)
+    init_request_metrics(app)
+
+    warm_up_models = [name.strip() for name in app.config["WARM_UP_MODELS"].split(",") if name.strip()]
+    if warm_up_models:
+        from .utils.nlp_models import warm_up, WARMABLE_MODELS
+        warm_up(WARMABLE_MODELS if warm_up_models == ["all"] else warm_up_models)
 
     github_bp = make_github_blueprint(
         client_id=app.config["GITHUB_CLIENT_ID"],
@@ -28,4 +29,6 @@ def create_app():
     app.register_blueprint(report_bp, url_prefix="/report")
     from .routes.file_routes import file_bp
     app.register_blueprint(file_bp, url_prefix="/pdf")
+    from .routes.metrics_routes import metrics_bp
+    app.register_blueprint(metrics_bp)
     return app
@@ -7,5 +7,9 @@ class Config:
     GITHUB_CLIENT_SECRET = os.getenv("GITHUB_CLIENT_SECRET")
     GITHUB_ACCESS_TOKEN = os.getenv("GITHUB_ACCESS_TOKEN")
     GITHUB_REDIRECT_URI = os.getenv("GITHUB_REDIRECT_URI")
+    # Comma-separated models to load at startup ("nltk,spacy,t5,classifier" or "all"); by default they load on first use
+    WARM_UP_MODELS = os.getenv("WARM_UP_MODELS", "")
+    # Honour the X-Profile request header (cprofile or pyinstrument) and answer with the request's profile instead
+    PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "") == "1"
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
     os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
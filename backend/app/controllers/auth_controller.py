@@ -1,6 +1,6 @@
 from flask import redirect, url_for, session, jsonify, request
 from flask_dance.contrib.github import github
-from ..utils.jwt_utils import create_jwt, decode_jwt
+from ..utils.jwt_utils import create_jwt, verify_jwt
 
 
 def github_login():
@@ -44,7 +44,7 @@ def status():
         return jsonify({"user": None, "message": "Missing or invalid Authorization header"}), 401
 
     token = auth_header.split(" ")[1]
-    user_data = decode_jwt(token)
+    user_data = verify_jwt(token)
 
     if not user_data:
         return jsonify({"user": None, "message": "Invalid or expired token"}), 401
@@ -1,18 +1,46 @@
-from flask import request, send_file
+import logging
+import os
+import re
 
+from flask import send_file, jsonify, url_for
+
+from ..utils.pdf_generator import PDF_CACHE_DIR, render_report_pdf
+from ..utils.wire import expand_report
+from ..middlewares.wire_middleware import read_payload
+
+REPORT_KEY = re.compile(r"^[0-9a-f]{32}$")
+
+logger = logging.getLogger(__name__)
 
-def gen_pdf():
 
+def send_report_pdf(path):
+    # conditional=True answers Range and If-None-Match requests, so large downloads can resume
+    response = send_file(path, mimetype="application/pdf", as_attachment=True,
+                         download_name="contribution-report.pdf", conditional=True, max_age=0)
+    key = os.path.splitext(os.path.basename(path))[0]
+    response.headers["Content-Location"] = url_for("file.report_pdf", key=key)
+    return response
+
+
+def gen_pdf():
+    try:
+        report = read_payload()
+        # Reports in the compact form of /report/generate?format=compact are expanded first
+        if isinstance(report, dict):
+            report = expand_report(report)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not isinstance(report, dict) or not isinstance(report.get("elaborated_commits"), list):
+        return jsonify({"error": "A /report/generate result with elaborated_commits is required"}), 400
+    try:
+        return send_report_pdf(render_report_pdf(report))
+    except Exception as e:
+        logger.exception("PDF generation failed")
+        return jsonify({"error": f"An error occurred during PDF generation: {str(e)}"}), 500
 
 
-    return None
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
\ No newline at end of file
+def report_pdf(key):
+    path = os.path.join(PDF_CACHE_DIR, f"{key}.pdf")
+    if not REPORT_KEY.match(key) or not os.path.exists(path):
+        return jsonify({"error": "Unknown or expired PDF"}), 404
+    return send_report_pdf(path)
@@ -0,0 +1,44 @@
+from flask import Response
+from ..utils.metrics import REGISTRY, Counter, Gauge
+from ..utils.github_cache import get_cache
+from ..utils.elaboration_cache import get_elaboration_cache
+from ..utils.doc_store import get_doc_cache
+from ..utils.report_cache import get_report_cache
+from ..utils.github_clients import get_github_clients
+
+PROMETHEUS_MIMETYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def cache_metrics():
+    """Counters of the response, elaboration, Doc and report caches, read from their stats() at scrape time."""
+    hits = Counter("cache_hits_total", "Cache lookups answered from the cache (GitHub: hits plus revalidations).",
+                   ["cache"])
+    misses = Counter("cache_misses_total", "Cache lookups that missed.", ["cache"])
+    evictions = Counter("cache_evictions_total", "Entries evicted to stay within the cache's budget.", ["cache"])
+    entries = Gauge("cache_entries", "Entries currently cached.", ["cache"])
+    hit_ratio = Gauge("cache_hit_ratio", "Hits over lookups since the process started.", ["cache"])
+
+    caches = {"github": get_cache(), "elaborations": get_elaboration_cache(), "docs": get_doc_cache(),
+              "reports": get_report_cache()}
+    for name, cache in caches.items():
+        if cache is None:
+            continue
+        stats = cache.stats()
+        hits.inc(stats["hits"] + stats.get("revalidated", 0), cache=name)
+        misses.inc(stats["misses"], cache=name)
+        evictions.inc(stats.get("evictions", 0), cache=name)
+        entries.set(stats["entries"], cache=name)
+        hit_ratio.set(stats["hit_ratio"], cache=name)
+
+    clients = Gauge("github_clients", "Per-user GitHub clients held by the registry.", ["state"])
+    stats = get_github_clients().stats()
+    clients.set(stats["leased"], state="leased")
+    clients.set(stats["clients"] - stats["leased"], state="idle")
+    return [hits, misses, evictions, entries, hit_ratio, clients]
+
+
+REGISTRY.add_collector(cache_metrics)
+
+
+def metrics():
+    return Response(REGISTRY.render(), content_type=PROMETHEUS_MIMETYPE)
@@ -1,104 +1,70 @@
 import os
-import requests
 import datetime
-from transformers import T5Tokenizer, T5ForConditionalGeneration
-import spacy
-import pytextrank
+import itertools
+import logging
+import queue
+import threading
+import time
 # import nltk
-from flask import request, jsonify
+from flask import request, jsonify, Response, url_for
 from ..utils.text_analysis import build_style_profile, summarize_profile
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
-
-from collections import defaultdict, Counter
-import re
-import math
-import pandas as pd
-from nltk import word_tokenize
-from nltk.util import ngrams
-
-nlp = spacy.load("en_core_web_lg")
-nlp.add_pipe("textrank")
-GITHUB_TOKEN = os.getenv("GITHUB_ACCESS_TOKEN")
-
-
-def fetch_commits_from_github(duration, username):
-    api_url = "https://api.github.com/user/repos"
-    headers = {
-        "Authorization": f"token {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github+json"
-    }
+from ..utils.github_api import stream_commits
+from ..utils.github_cache import get_cache
+from ..utils.github_clients import get_github_clients
+from ..utils.commit_store import get_commit_store
+from ..utils.model_api import elaborate_messages, is_cacheable
+from ..utils.elaboration_cache import cached_elaborations, get_elaboration_cache
+from ..utils.t5_worker import get_t5_worker, T5_PROMPT_TEMPLATE
+from ..utils.github_graphql import stream_commits_graphql
+from ..utils.collocations import tokenize, NgramCounts
+from ..utils.commit_classifier import get_commit_classifier
+from ..utils.doc_store import DocStore, get_doc_cache
+from ..utils.summarizer import summarize
+from ..utils.report_jobs import get_job_queue, DONE, FAILED
+from ..utils.pipeline import run_stages
+from ..utils.report_cache import get_report_cache
+from ..utils.wire import dumps, compact_commits, expand_commits, compact_report
+from ..utils.metrics import REPORT_STAGE_SECONDS
+from ..middlewares.auth_middleware import jwt_optional
+from ..middlewares.wire_middleware import read_payload, wire_response
+
+# spaCy, sklearn and NLTK are imported where they are used, so that
+# importing this module (and booting a worker) stays cheap
+GITHUB_TOKEN = os.getenv("GITHUB_ACCESS_TOKEN")  # used for requests without a user JWT
+GITHUB_FETCH_BACKEND = os.getenv("GITHUB_FETCH_BACKEND", "rest")  # "rest" or "graphql"
+STREAM_MIMETYPES = {"sse": "text/event-stream", "ndjson": "application/x-ndjson"}
+REPORT_JOB_POLL_INTERVAL = 0.5  # seconds between job store reads while streaming events
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_commits_from_github(duration, username, token=None):
+    token = token or GITHUB_TOKEN
+    current_date = datetime.datetime.utcnow()
+    start_date = current_date - datetime.timedelta(days=duration)
+    since = start_date.isoformat() + "Z"
+    store = get_commit_store()
+    if GITHUB_FETCH_BACKEND == "graphql":
+        return stream_commits_graphql(token, username, since, store=store)
+    return stream_commits(token, username, since, store=store)
 
-    response = requests.get(api_url, headers=headers)
 
-    if response.status_code != 200:
-        return None, response.status_code
+def timed_fetch(commits):
+    """Pass commits through, recording how long the whole fetch took once they run out."""
+    with REPORT_STAGE_SECONDS.time(stage="github_fetch"):
+        yield from commits
 
-    repos = response.json()
-    commits = []
-    current_date = datetime.datetime.utcnow()
-    start_date = current_date - datetime.timedelta(days=duration)
 
-    for repo in repos:
-        repo_name = repo["name"]
-        owner = repo["owner"]["login"]
-        commits_url = f"https://api.github.com/repos/{owner}/{repo_name}/commits"
-        languages_url = f"https://api.github.com/repos/{owner}/{repo_name}/languages"
-
-        # Fetch language breakdown
-        lang_response = requests.get(languages_url, headers=headers)
-        lang_data = {}
-        if lang_response.status_code == 200:
-            lang_data = lang_response.json()
-            total_bytes = sum(lang_data.values())
-            for lang in lang_data:
-                lang_data[lang] = round((lang_data[lang] / total_bytes) * 100, 2)  # percentage
-
-        params = {
-            "since": start_date.isoformat() + "Z",
-            "author": username
-        }
+def json_array_chunks(items):
+    """Encode an iterable as a JSON array one element at a time."""
+    yield b"["
+    for i, item in enumerate(items):
+        yield (b"," if i else b"") + dumps(item)
+    yield b"]"
 
-        repo_commits_response = requests.get(commits_url, headers=headers, params=params)
-
-        if repo_commits_response.status_code == 200:
-            repo_commits = repo_commits_response.json()
-            for commit in repo_commits:
-                commit_message = commit.get("commit", {}).get("message", "")
-                commit_date = commit.get("commit", {}).get("committer", {}).get("date", "")
-                commit_url = commit.get("url")
-
-                loc_additions = 0
-                loc_deletions = 0
-                commit_detail_response = requests.get(commit_url, headers=headers)
-                if commit_detail_response.status_code == 200:
-                    commit_detail = commit_detail_response.json()
-                    stats = commit_detail.get("stats", {})
-                    loc_additions = stats.get("additions", 0)
-                    loc_deletions = stats.get("deletions", 0)
-
-                # LOC distribution across languages (estimated, not exact per commit)
-                loc_per_language = {}
-                for lang, percent in lang_data.items():
-                    loc_per_language[lang] = {
-                        "estimated_additions": round((percent / 100) * loc_additions),
-                        "estimated_deletions": round((percent / 100) * loc_deletions)
-                    }
-
-                commits.append({
-                    "message": commit_message,
-                    "repo": repo_name,
-                    "date": commit_date,
-                    "additions": loc_additions,
-                    "deletions": loc_deletions,
-                    "language_distribution": lang_data,  # percentages
-                    "loc_per_language": loc_per_language  # estimated LOC
-                })
-
-    return commits, 200
-
-
-# Controller function to handle commit fetching
+
+# Controller function to handle commit fetching, with the signed-in user's GitHub token when there is one
+@jwt_optional
 def get_commits():
     duration = request.args.get("duration")
     user = request.args.get("username")
@@ -111,230 +77,333 @@ def get_commits():
     except ValueError:
         return jsonify({"error": "Duration must be a valid number"}), 400
 
-    commits, status_code = fetch_commits_from_github(duration, user)
+    commits, status_code = fetch_commits_from_github(duration, user, request.user and request.user.get("token"))
 
     if status_code != 200:
         return jsonify({"error": "Failed to fetch commits from GitHub"}), status_code
 
-    if not commits:
+    first_commit = next(commits, None)
+    if first_commit is None:
         return jsonify({"message": "No commits found for the given duration."}), 200
 
-    return jsonify(commits)
+    commits = timed_fetch(itertools.chain([first_commit], commits))
+    # ?format=compact sends each repo's languages once and the commits as columns, in the negotiated encoding
+    if request.args.get("format") == "compact":
+        return wire_response(compact_commits(commits))
+
+    # Stream commits as they are fetched instead of buffering the whole list
+    if request.args.get("format") == "ndjson":
+        return Response((dumps(commit) + b"\n" for commit in commits), mimetype="application/x-ndjson")
+    return Response(json_array_chunks(commits), mimetype="application/json")
+
+
+def github_cache_stats():
+    cache = get_cache()
+    if cache is None:
+        return jsonify({"error": "GitHub response cache is disabled"}), 404
+    return jsonify(cache.stats()), 200
+
+
+def elaboration_cache_stats():
+    cache = get_elaboration_cache()
+    if cache is None:
+        return jsonify({"error": "Elaboration cache is disabled"}), 404
+    return jsonify(cache.stats()), 200
+
+
+def report_cache_stats():
+    cache = get_report_cache()
+    if cache is None:
+        return jsonify({"error": "Report cache is disabled"}), 404
+    return jsonify(cache.stats()), 200
+
+
+def github_client_stats():
+    return jsonify(get_github_clients().stats()), 200
+
+
+def doc_cache_stats():
+    cache = get_doc_cache()
+    if cache is None:
+        return jsonify({"error": "Doc cache is disabled"}), 404
+    return jsonify(cache.stats()), 200
+
+
+def no_progress(event, **data):
+    pass
+
+
+def build_report(commits, progress=no_progress):
+    """
+    The full report for a list of commits with messages.
+
+    The stages run as a dependency graph: collocation patterns only need the
+    original messages, so they run alongside LLM elaboration, and the style,
+    classification and summary stages run together once the elaborations are
+    parsed. `progress(event, **data)` is told when each stage starts and as
+    each commit's elaboration comes back, with the elaborated commit itself.
+    Stage timings are part of the report, and `degraded` names the sections
+    whose stage failed and holds an "error" instead of its result.
+    """
+    start = time.perf_counter()
+    total = len(commits)
+    done = itertools.count(1)
+    elaborated_commits = [None] * total
+
+    def on_elaboration(index, elaboration):
+        commit = commits[index]
+        elaborated_commits[index] = {
+            "original": commit.get("message"),
+            "elaboration": elaboration,
+            "repo": commit.get("repo"),
+            "date": commit.get("date"),
+            "additions": commit.get("additions"),
+            "deletions": commit.get("deletions"),
+            "language_distribution": commit.get("language_distribution", {}),
+            "loc_per_language": commit.get("loc_per_language", {})
+        }
+        progress("commit", index=index, done=next(done), total=total, commit=elaborated_commits[index])
+
+    def elaborate():
+        elaborate_messages([commit["message"] for commit in commits], on_result=on_elaboration)
+        return elaborated_commits
+
+    def parse(elaboration):
+        # Parse every original and elaboration once for the analyses that follow
+        return DocStore([entry[field] for entry in elaboration for field in ("original", "elaboration")])
+
+    stages = {
+        "elaboration": (elaborate, ()),
+        "patterns": (lambda: analyze_commit_patterns({"original": commit["message"]} for commit in commits), ()),
+        "parsing": (parse, ("elaboration",)),
+        "analysis": (lambda elaboration, parsing: analyze(elaboration, parsing), ("elaboration", "parsing")),
+        "classification": (lambda elaboration, parsing: classify(elaboration, parsing), ("elaboration", "parsing")),
+        "summary": (lambda elaboration, parsing: summary(elaboration, parsing), ("elaboration", "parsing")),
+    }
+    results, timings = run_stages(stages, on_start=lambda name: progress("stage", stage=name))
+
+    for entry, category in zip(elaborated_commits, results["classification"]):
+        entry["category"] = category
+    timings["total"] = round(time.perf_counter() - start, 4)
+    for stage, seconds in timings.items():
+        REPORT_STAGE_SECONDS.observe(seconds, stage=stage)
+
+    report = {
+        "elaborated_commits": elaborated_commits,
+        "summarization": results["summary"],
+        "analysis": results["analysis"],
+        "patterns_analysis": results["patterns"],
+        "timings": timings
+    }
+    report["degraded"] = [section for section, result in report.items()
+                          if isinstance(result, dict) and "error" in result]
+    return report
+
+
+def cached_report(commits, key, progress=no_progress):
+    """
+    `build_report` through the report cache: (report, "hit" | "miss" | "uncached").
 
+    A hit replays one "commit" progress event per commit. Reports with a
+    failed elaboration or a degraded section are not stored, so the next
+    request retries the model or the failed stage.
+    """
+    cache = get_report_cache()
+    if cache is None:
+        return build_report(commits, progress), "uncached"
 
-GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
-API_KEY = os.getenv("T5-API")
+    report = cache.get(key)
+    if report is not None:
+        total = len(report["elaborated_commits"])
+        for index, entry in enumerate(report["elaborated_commits"]):
+            progress("commit", index=index, done=index + 1, total=total, commit=entry)
+        return report, "hit"
+
+    report = build_report(commits, progress)
+    if report["degraded"] or not all(is_cacheable(entry["elaboration"]) for entry in report["elaborated_commits"]):
+        return report, "uncached"
+    cache.put(key, report)
+    return report, "miss"
 
 
 def generate_report():
     try:
-        data = request.get_json()
-        commits = data.get("commits")
+        try:
+            data = read_payload()
+            commits = data.get("commits") if isinstance(data, dict) else None
+            # Commits in the compact form of /report/commit?format=compact
+            if isinstance(commits, dict):
+                commits = expand_commits(commits)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
         if not commits or not isinstance(commits, list):
             return jsonify({"error": "Commits must be a list"}), 400
 
-        elaborated_commits = []
-        for commit in commits:
-            message = commit.get("message")
-            repo = commit.get("repo")
-            date = commit.get("date")
-            additions = commit.get("additions")
-            deletions = commit.get("deletions")
-            lang_dist = commit.get("language_distribution", {})
-            loc_per_lang = commit.get("loc_per_language", {})
-
-            if not message:
-                continue
-
-            prompt = f"Explain the commit message in 40 words: {message}"
-            response = requests.post(
-                f"{GEMINI_API_URL}?key={API_KEY}",
-                json={
-                    "contents": [{"role": "user", "parts": [{"text": prompt}]}]
-                },
-                headers={"Content-Type": "application/json"}
-            )
-
-            if response.status_code == 200:
-                res_json = response.json()
-                elaboration = (
-                    res_json.get("candidates", [{}])[0]
-                    .get("content", {})
-                    .get("parts", [{}])[0]
-                    .get("text", "No explanation available.")
-                )
-            else:
-                elaboration = f"Error: {response.status_code}, Unable to explain message."
-
-            elaborated_commits.append({
-                "original": message,
-                "elaboration": elaboration,
-                "repo": repo,
-                "date": date,
-                "additions": additions,
-                "deletions": deletions,
-                "language_distribution": lang_dist,
-                "loc_per_language": loc_per_lang
-            })
-
-        analysis = analyze(elaborated_commits)
-        elaborated_commits = classification(elaborated_commits)
-        summarization = summary(elaborated_commits)
-        patterns_analysis = analyze_commit_patterns(elaborated_commits)
-
-        return jsonify({
-            "elaborated_commits": elaborated_commits,
-            "summarization": summarization,
-            "analysis": analysis,
-            "patterns_analysis": patterns_analysis
-        }), 200
+        commits = [commit for commit in commits if commit.get("message")]
+        cache = get_report_cache()
+        key = cache.key(commits) if cache is not None else None
+
+        # ?stream=sse or ?stream=ndjson sends each commit as it is elaborated, then the aggregate sections
+        stream_format = request.args.get("stream")
+        if stream_format in STREAM_MIMETYPES:
+            return Response(stream_report(commits, key, stream_format), mimetype=STREAM_MIMETYPES[stream_format],
+                            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+        # ?async=1 queues the report and answers with a job to poll
+        if request.args.get("async") == "1":
+            job_id = get_job_queue().submit(lambda progress: cached_report(commits, key, progress)[0])
+            return jsonify({"job_id": job_id, "status_url": url_for("report.report_job", job_id=job_id)}), 202
+
+        # The ETag is the cache key, so a client already holding this report needs nothing recomputed
+        compact = request.args.get("format") == "compact"
+        etag = f"{key}-compact" if compact and key is not None else key
+        if etag is not None and request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+            response.set_etag(etag, weak=True)
+            return response
+
+        report, source = cached_report(commits, key)
+        response = wire_response(compact_report(report) if compact else report,
+                                 etag=etag if source != "uncached" else None)
+        response.headers["X-Report-Cache"] = source
+        return response
 
     except Exception as e:
-        # Log the full traceback of the exception
-        # logging.error(f"Error occurred during report generation: {str(e)}")
-        # logging.error(traceback.format_exc())  # Logs the full traceback
-
-        # Return a more detailed error response
+        logger.exception("Report generation failed")
         return jsonify({"error": f"An error occurred during report generation: {str(e)}"}), 500
 
-import traceback
-# import logging
-#
-# logging.basicConfig(level=logging.ERROR)
-
-
-def preprocess_text(text):
-    text = text.lower()
-    tokens = word_tokenize(text)
-    tokens = [token for token in tokens if re.match(r'^[a-zA-Z_]+$', token)]
-    return tokens
-
-
-def get_ngrams(tokens, n):
-    """Generate n-grams from token list"""
-    return list(ngrams(tokens, n))
-
-
-def calculate_pmi(corpus, ngram, ngram_counts):
-    """Calculate Pointwise Mutual Information for an n-gram"""
-    n = len(ngram)
-    total_ngrams = len(ngram_counts)
 
-    # Count of the n-gram
-    ngram_count = ngram_counts.get(ngram, 0)
-    if ngram_count == 0:
-        return 0
-
-    # Calculate P(ngram)
-    p_ngram = ngram_count / total_ngrams
+def encode_event(stream_format, event, data, event_id=None):
+    if stream_format == "ndjson":
+        return dumps({"event": event, "data": data}).decode() + "\n"
+    return (f"id: {event_id}\n" if event_id is not None else "") + f"event: {event}\ndata: {dumps(data).decode()}\n\n"
+
+
+def stream_report(commits, key, stream_format):
+    """
+    Events of a report built on a background thread, encoded as they happen.
+
+    "commit" events carry each elaborated commit as soon as its model call
+    returns, "stage" events mark stage starts, and a final "report" event
+    holds the aggregate sections plus each commit's category, by index.
+    """
+    events = queue.Queue()
+
+    def run():
+        try:
+            report, _ = cached_report(commits, key, progress=lambda event, **data: events.put((event, data)))
+        except Exception as e:
+            logger.exception("Streamed report generation failed")
+            events.put(("error", {"error": f"An error occurred during report generation: {str(e)}"}))
+        else:
+            elaborated_commits = report.pop("elaborated_commits")
+            report["categories"] = [entry["category"] for entry in elaborated_commits]
+            events.put(("report", report))
+        finally:
+            events.put(None)
+
+    threading.Thread(target=run, name="report-stream", daemon=True).start()
+    while True:
+        item = events.get()
+        if item is None:
+            return
+        event, data = item
+        if event == "commit":
+            data = dict(data["commit"], index=data["index"], done=data["done"], total=data["total"])
+        yield encode_event(stream_format, event, data)
+
+
+def report_job(job_id):
+    job = get_job_queue().store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    return jsonify(job), 200
+
+
+def report_job_events(job_id):
+    """
+    Progress events of a job after ?after=<seq>.
+
+    With `Accept: text/event-stream` the events are streamed as server-sent
+    events until the job finishes; otherwise the ones so far are returned.
+    """
+    store = get_job_queue().store
+    if store.get(job_id) is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
+    try:
+        # EventSource sends the last id it saw when it reconnects
+        after = int(request.headers.get("Last-Event-ID") or request.args.get("after", 0))
+    except ValueError:
+        return jsonify({"error": "after must be a valid number"}), 400
 
-    # Calculate P(w1) * P(w2) * ... for each word in the n-gram
-    p_product = 1
-    for word in ngram:
-        # Count how many times this word appears in any n-gram
-        word_count = sum(count for ng, count in ngram_counts.items() if word in ng)
-        p_word = word_count / total_ngrams
-        p_product *= p_word
+    if request.accept_mimetypes.best != "text/event-stream":
+        return jsonify({"events": store.events(job_id, after)}), 200
 
-    if p_product == 0:
-        return 0
+    def stream(after):
+        while True:
+            job = store.get(job_id)
+            for event in store.events(job_id, after):
+                after = event["seq"]
+                yield encode_event("sse", event["event"], event["data"], after)
+            if job is None or job["status"] in (DONE, FAILED):
+                yield encode_event("sse", job["status"] if job else "expired", {"error": job and job["error"]})
+                return
+            time.sleep(REPORT_JOB_POLL_INTERVAL)
 
-    pmi = math.log2(p_ngram / p_product)
-    return pmi
+    return Response(stream(after), mimetype="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 
 def analyze_commit_patterns(commits):
-    """Analyze commit messages for n-grams and collocations"""
-    try:
-        # Extract all commit messages
-        commit_messages = [item['original'] for item in commits]
-
-        # Tokenize all messages
-        all_tokens = []
-        for message in commit_messages:
-            all_tokens.extend(preprocess_text(message))
-
-        # Generate bigrams and trigrams
-        bigrams = get_ngrams(all_tokens, 2)
-        trigrams = get_ngrams(all_tokens, 3)
-
-        # Count frequencies
-        bigram_counts = Counter(bigrams)
-        trigram_counts = Counter(trigrams)
-
-        # Calculate PMI for all bigrams
-        bigram_pmi = {}
-        for bigram in set(bigrams):
-            bigram_pmi[bigram] = calculate_pmi(all_tokens, bigram, bigram_counts)
-
-        # Create a DataFrame of bigrams with counts and PMI
-        bigram_data = []
-        for bigram, count in bigram_counts.most_common():
-            pmi = bigram_pmi.get(bigram, 0)
-            bigram_data.append({
-                'bigram': ' '.join(bigram),
-                'count': count,
-                'pmi': pmi
-            })
+    """
+    Analyze commit messages for n-grams and collocations.
 
-        bigram_df = pd.DataFrame(bigram_data)
+    `commits` may be any iterable, e.g. a generator over a huge multi-repo
+    history: n-grams are counted per message into bounded frequency tables
+    (see PATTERN_SKETCH_CAPACITY), so memory does not grow with the input.
+    """
+    try:
+        counts = NgramCounts()
+        for item in commits:
+            counts.update(tokenize(item['original']))
 
-        # Convert to dictionary for JSON serialization
         patterns_analysis = {
-            'top_bigrams': bigram_df.sort_values('pmi', ascending=False).head(10).to_dict('records'),
-            'top_trigrams': [{'trigram': ' '.join(t), 'count': c} for t, c in trigram_counts.most_common(5)]
+            'top_bigrams': [
+                {'bigram': ' '.join(bigram), 'count': count, 'pmi': pmi}
+                for bigram, count, pmi in counts.top_collocations(2, 10)
+            ],
+            'top_trigrams': [
+                {'trigram': ' '.join(trigram), 'count': count, 'pmi': pmi}
+                for trigram, count, pmi in counts.most_common(3, 5)
+            ]
         }
 
         return patterns_analysis
 
     except Exception as e:
-        logging.error(f"Error in analyze_commit_patterns: {str(e)}")
+        logger.exception("Commit pattern analysis failed")
         return {"error": str(e)}
 
 
-def classification(elaborated_commit):
-    texts = [entry["elaboration"].strip() for entry in elaborated_commit]
+def classify(elaborated_commit, docs=None):
+    """The category of each elaborated commit, in order."""
+    if docs is None:
+        return get_commit_classifier().predict([entry["elaboration"].strip() for entry in elaborated_commit])
+    token_lists = [[token.lower_ for token in docs[entry["elaboration"]]] for entry in elaborated_commit]
+    return get_commit_classifier().predict_tokens(token_lists)
 
-    # Vectorize with TF-IDF
-    vectorizer = TfidfVectorizer(stop_words='english')
-    X = vectorizer.fit_transform(texts)
 
-    # KMeans Clustering
-    kmeans = KMeans(n_clusters=4, random_state=42)
-    labels = kmeans.fit_predict(X)
-
-    # Define category mappings
-    label_map = {
-        0: "New Features",
-        1: "Testing/Debugging",
-        2: "Initializations",
-        3: "Maintenance/Miscellaneous"
-    }
-
-    for i, entry in enumerate(elaborated_commit):
-        entry["category"] = label_map[labels[i]]
-
-    return elaborated_commit
-
-
-def summary(elaborated_commits):
-    combined_text = " ".join(entry["elaboration"].strip() for entry in elaborated_commits)
-    doc = nlp(combined_text)
-    summary_sentences = [sent.text.strip() for sent in doc._.textrank.summary(limit_phrases=10, limit_sentences=10)]
-    return summary_sentences
+def summary(elaborated_commits, docs=None):
+    return summarize(((entry.get("repo"), entry["elaboration"]) for entry in elaborated_commits), docs=docs)
 
 
-def analyze(elaborated_commits):
-    profile_data = build_style_profile(elaborated_commits)
+def analyze(elaborated_commits, docs=None):
+    profile = build_style_profile(elaborated_commits, docs=docs)
+    means = profile.means()
 
     summary_result = {}
-    for dev in profile_data:
-        metric_map = defaultdict(list)
-        for i in range(len(profile_data[dev])):
-            for key in ['length', 'noun_ratio', 'verb_ratio', 'polarity', 'subjectivity', 'type_token_ratio']:
-                metric_map[key].append(profile_data[dev][i])
-        summary_result[dev] = summarize_profile(dev, metric_map)
+    for i, dev in enumerate(profile.groups):
+        summary_result[dev] = summarize_profile(dev, {metric: values[i] for metric, values in means.items()})
 
     return summary_result
 
@@ -383,8 +452,6 @@ def analyze(elaborated_commits):
 # tokenizer = T5Tokenizer.from_pretrained(models_dir)
 # model = T5ForConditionalGeneration.from_pretrained(models_dir)
 
-tokenizer = T5Tokenizer.from_pretrained("t5-small")
-model = T5ForConditionalGeneration.from_pretrained("t5-small")
 
 def generation_report():
     try:
@@ -395,30 +462,22 @@ def generation_report():
         if not commits or not isinstance(commits, list):
             return jsonify({"error": "Commits must be a list"}), 400
 
-        elaborated_commits = []
-
-        for commit in commits:
-            message = commit.get("message")
-            repo = commit.get("repo")
-            date = commit.get("date")
-
-            if not message:
-                continue
-
-            input_text = f"Explain the work done in code based on the following commit message: {message}"
-            input_ids = tokenizer.encode(input_text, return_tensors="pt", max_length=64, truncation=True)
-
-            output_ids = model.generate(input_ids, max_length=128, num_beams=4, early_stopping=True)
-            elaboration = tokenizer.decode(output_ids[0], skip_special_tokens=True)
+        commits = [commit for commit in commits if commit.get("message")]
+        messages = [commit["message"] for commit in commits]
+        worker = get_t5_worker()
+        elaborations = cached_elaborations(T5_PROMPT_TEMPLATE, worker.model_id, messages, worker.elaborate)
 
+        elaborated_commits = []
+        for commit, elaboration in zip(commits, elaborations):
             elaborated_commits.append({
-                "original": message,
+                "original": commit["message"],
                 "elaboration": elaboration,
-                "repo": repo,
-                "date": date
+                "repo": commit.get("repo"),
+                "date": commit.get("date")
             })
 
         return jsonify({"elaborated_commits": elaborated_commits}), 200
 
     except Exception as e:
+        logger.exception("T5 report generation failed")
         return jsonify({"error": f"An error occurred: {str(e)}"}), 500
@@ -1,6 +1,14 @@
 from functools import wraps
 from flask import request, jsonify
-from ..utils.jwt_utils import decode_jwt
+from ..utils.jwt_utils import verify_jwt
+
+
+def bearer_user():
+    """Verified JWT payload of the request's `Authorization: Bearer` header, or None."""
+    auth_header = request.headers.get("Authorization")
+    if not auth_header or not auth_header.startswith("Bearer "):
+        return None
+    return verify_jwt(auth_header.split(" ")[1])
 
 
 def jwt_required(f):
@@ -10,8 +18,29 @@ def jwt_required(f):
         if not auth_header or not auth_header.startswith("Bearer "):
             return jsonify({"error": "Missing or invalid Authorization header"}), 401
 
-        token = auth_header.split(" ")[1]
-        user = decode_jwt(token)
+        user = bearer_user()
+        if not user:
+            return jsonify({"error": "Invalid or expired token"}), 401
+
+        request.user = user
+        return f(*args, **kwargs)
+    return decorated
+
+
+def jwt_optional(f):
+    """
+    Like `jwt_required`, but requests without an `Authorization: Bearer`
+    header go through with `request.user` set to None. A Bearer token that
+    does not verify is still rejected with a 401.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        auth_header = request.headers.get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            request.user = None
+            return f(*args, **kwargs)
+
+        user = bearer_user()
         if not user:
             return jsonify({"error": "Invalid or expired token"}), 401
 
@@ -0,0 +1,113 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+
+from flask import request, g, Response
+from ..utils.metrics import HTTP_REQUEST_SECONDS
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_TOP_FUNCTIONS = 60
+
+# One profiled request at a time: from Python 3.12 cProfile refuses to start
+# while another profiler is active
+_profile_lock = threading.Lock()
+
+
+def init_request_metrics(app):
+    """
+    Time every request into `http_request_seconds` and, when the app's
+    PROFILE_REQUESTS setting is on, profile requests sent with an
+    `X-Profile: cprofile` or `X-Profile: pyinstrument` header.
+
+    A profiled request is answered with the profile instead of its usual
+    body: pstats text sorted by cumulative time, or pyinstrument's HTML when
+    it is installed. A streamed body is generated inside the profile.
+
+    Only one request is profiled at a time; a second profiled request while
+    one runs is answered 409. Before Python 3.12 cProfile sees only the
+    request thread, so work on the report stage and model call pools shows
+    up as time spent waiting on them. From 3.12 it sees every thread, other
+    requests included, and pyinstrument still sees only the request thread.
+    """
+    @app.before_request
+    def start_request():
+        g.request_started = time.perf_counter()
+        mode = request.headers.get(PROFILE_HEADER, "").strip().lower()
+        if mode and app.config.get("PROFILE_REQUESTS"):
+            profiler = start_profiler(mode)
+            if profiler is None:
+                return Response("A profiler is already running, try again once it finishes.\n",
+                                status=409, mimetype="text/plain")
+            g.profiler = profiler
+
+    @app.after_request
+    def finish_request(response):
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            response.direct_passthrough = False
+            response.get_data()
+            response = profile_response(profiler)
+        started = g.pop("request_started", None)
+        if started is not None:
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=request.endpoint or "unmatched",
+                                         method=request.method, status=response.status_code)
+        return response
+
+    @app.teardown_request
+    def stop_abandoned_profiler(exc):
+        # A request that failed before after_request still has to free the profiler
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            stop_profiler(profiler)
+
+
+def start_profiler(mode):
+    """Start a profiler for this request, or return None while another request holds it."""
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    try:
+        if mode == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                pass  # falls back to cProfile; the X-Profile response header says which one ran
+            else:
+                profiler = Profiler()
+                profiler.start()
+                return profiler
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+    except ValueError:
+        # Some other tool (a debugger, coverage) holds the interpreter's profiler
+        _profile_lock.release()
+        return None
+    except BaseException:
+        _profile_lock.release()
+        raise
+
+
+def stop_profiler(profiler):
+    try:
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+        else:
+            profiler.stop()
+    finally:
+        _profile_lock.release()
+
+
+def profile_response(profiler):
+    stop_profiler(profiler)
+    if isinstance(profiler, cProfile.Profile):
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        response = Response(out.getvalue(), mimetype="text/plain")
+        response.headers[PROFILE_HEADER] = "cprofile"
+    else:
+        response = Response(profiler.output_html(), mimetype="text/html")
+        response.headers[PROFILE_HEADER] = "pyinstrument"
+    response.headers["Cache-Control"] = "no-store"
+    return response
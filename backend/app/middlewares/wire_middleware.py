@@ -0,0 +1,25 @@
+from flask import request, Response
+from ..utils.wire import negotiate, encode_body, decode_body
+
+
+def read_payload():
+    """The request body as JSON or MessagePack, gzip-compressed or not. Raises ValueError when undecodable."""
+    return decode_body(request.get_data(cache=False), request.mimetype,
+                       request.headers.get("Content-Encoding", "").strip().lower() or None)
+
+
+def wire_response(data, status=200, etag=None):
+    """
+    Response in the representation the client asked for: JSON or MessagePack
+    by `Accept`, brotli or gzip by `Accept-Encoding`. `etag` is sent weak,
+    as it names the content whatever its encoding.
+    """
+    mimetype, encoding = negotiate(request.accept_mimetypes, request.accept_encodings)
+    body, encoding = encode_body(data, mimetype, encoding)
+    response = Response(body, status=status, mimetype=mimetype)
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.update(("Accept", "Accept-Encoding"))
+    if etag is not None:
+        response.set_etag(etag, weak=True)
+    return response
@@ -1,7 +1,10 @@
 from flask import Blueprint
-from ..controllers.file_controller import gen_pdf
+from ..controllers.file_controller import gen_pdf, report_pdf
 
 file_bp = Blueprint("file", __name__)
 
 # Route to generate a report
 file_bp.add_url_rule("/gen_pdf", view_func=gen_pdf, methods=["POST"])
+
+# A PDF already rendered by /gen_pdf, for resuming its download with Range requests
+file_bp.add_url_rule("/reports/<key>", view_func=report_pdf)
@@ -0,0 +1,7 @@
+from flask import Blueprint
+from ..controllers.metrics_controller import metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+# Prometheus scrape endpoint: request and stage latencies, outbound calls, cache counters, model load times
+metrics_bp.add_url_rule("/metrics", view_func=metrics)
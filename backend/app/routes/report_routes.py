@@ -1,10 +1,32 @@
 from flask import Blueprint
-from ..controllers.report_controller import get_commits, generate_report, summary
+from ..controllers.report_controller import get_commits, generate_report, summary, github_cache_stats, \
+    elaboration_cache_stats, doc_cache_stats, github_client_stats, report_cache_stats, report_job, report_job_events
 
 report_bp = Blueprint("report", __name__)
 
 # Route to fetch commits based on duration and username
 report_bp.add_url_rule("/commit", view_func=get_commits)
 
+# GitHub response cache hit/miss counters
+report_bp.add_url_rule("/cache/github", view_func=github_cache_stats)
+
+# Elaboration cache hit/miss counters
+report_bp.add_url_rule("/cache/elaborations", view_func=elaboration_cache_stats)
+
+# Per-user GitHub client registry counters and each client's rate-limit budget
+report_bp.add_url_rule("/cache/github-clients", view_func=github_client_stats)
+
+# Parsed elaboration (spaCy Doc) cache hit/miss counters
+report_bp.add_url_rule("/cache/docs", view_func=doc_cache_stats)
+
+# Whole-report cache hit/miss counters and pipeline version
+report_bp.add_url_rule("/cache/reports", view_func=report_cache_stats)
+
 # Route to generate a report
-report_bp.add_url_rule("/generate", view_func=generate_report, methods=["POST"])
\ No newline at end of file
+report_bp.add_url_rule("/generate", view_func=generate_report, methods=["POST"])
+
+# Status and result of a report queued with /generate?async=1
+report_bp.add_url_rule("/jobs/<job_id>", view_func=report_job)
+
+# Progress events of a queued report, polled or as server-sent events
+report_bp.add_url_rule("/jobs/<job_id>/events", view_func=report_job_events)
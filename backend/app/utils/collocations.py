@@ -0,0 +1,140 @@
+import heapq
+import os
+import re
+from collections import Counter
+
+import numpy as np
+
+from .nlp_models import ensure_nltk_data
+
+PATTERN_MIN_COUNT = int(os.getenv("PATTERN_MIN_COUNT", "1"))  # n-grams seen fewer times get no PMI score
+# Entries kept per frequency table (unigrams, bigrams, trigrams); 0 keeps exact, unbounded counts
+PATTERN_SKETCH_CAPACITY = int(os.getenv("PATTERN_SKETCH_CAPACITY", "100000"))
+
+WORD_PATTERN = re.compile(r"^[a-zA-Z_]+$")
+
+PATTERNS_VERSION = 1  # bump when the tokenization or scoring of collocations changes
+
+
+def patterns_version():
+    return [PATTERNS_VERSION, PATTERN_MIN_COUNT, PATTERN_SKETCH_CAPACITY]
+
+
+def tokenize(text):
+    """Lowercased word tokens of a commit message, without punctuation or numbers."""
+    from nltk import word_tokenize
+    ensure_nltk_data()
+    return [token for token in word_tokenize(text.lower()) if WORD_PATTERN.match(token)]
+
+
+class SpaceSaving:
+    """
+    Approximate counts of the most frequent items in a stream, in bounded memory.
+
+    Counts are exact until more than `2 * capacity` distinct items have been
+    seen. Then the table is cut back to the `capacity` largest counts, and an
+    item that (re)appears afterwards starts from the largest count dropped so
+    far (`floor`), which is recorded as its possible overcount in `errors`.
+    Anything occurring more often than the dropped counts is guaranteed to be kept.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.floor = 0
+        self.errors = {}
+        self._counts = {}
+
+    def update(self, items):
+        counts = self._counts
+        for item in items:
+            count = counts.get(item)
+            if count is None:
+                count = self.floor
+                if count:
+                    self.errors[item] = count
+            counts[item] = count + 1
+        if len(counts) > 2 * self.capacity:
+            self._prune()
+
+    def get(self, item, default=0):
+        return self._counts.get(item, self.floor if self.floor else default)
+
+    def __getitem__(self, item):
+        return self._counts.get(item, self.floor)
+
+    def __len__(self):
+        return len(self._counts)
+
+    def items(self):
+        return self._counts.items()
+
+    def most_common(self, k):
+        return heapq.nlargest(k, self._counts.items(), key=lambda item: item[1])
+
+    def _prune(self):
+        kept = heapq.nlargest(self.capacity, self._counts.items(), key=lambda item: item[1])
+        self.floor = max(self.floor, kept[-1][1])
+        self._counts = dict(kept)
+        self.errors = {item: self.errors[item] for item in self._counts if item in self.errors}
+
+
+class NgramCounts:
+    """
+    Unigram and n-gram frequency tables, filled in a single pass over each token list.
+
+    Each `update` is one message: n-grams never span two messages. With a
+    `capacity` the tables are Space-Saving sketches of that size instead of
+    exact Counters, so memory stays bounded however many commits stream in.
+    Totals are always exact.
+    """
+
+    def __init__(self, orders=(2, 3), capacity=PATTERN_SKETCH_CAPACITY):
+        table = (lambda: SpaceSaving(capacity)) if capacity else Counter
+        self.unigrams = table()
+        self.ngrams = {n: table() for n in orders}
+        self.totals = Counter()
+
+    def update(self, tokens):
+        self.unigrams.update(tokens)
+        self.totals[1] += len(tokens)
+        for n, counts in self.ngrams.items():
+            counts.update(zip(*(tokens[i:] for i in range(n))))
+            self.totals[n] += max(len(tokens) - n + 1, 0)
+
+    def pmi_scores(self, n, min_count=PATTERN_MIN_COUNT):
+        """(ngrams, counts, pmi) for the n-grams certainly seen at least `min_count` times."""
+        ngram_counts = self.ngrams[n]
+        errors = getattr(ngram_counts, "errors", {})
+        ngrams = [ngram for ngram, count in ngram_counts.items() if count - errors.get(ngram, 0) >= min_count]
+        counts = np.fromiter((ngram_counts[ngram] for ngram in ngrams), dtype=np.int64, count=len(ngrams))
+        return ngrams, counts, self._pmi(n, ngrams, counts)
+
+    def top_collocations(self, n, k, min_count=PATTERN_MIN_COUNT):
+        """The `k` highest-PMI n-grams as (ngram, count, pmi), ties broken by count."""
+        ngrams, counts, pmi = self.pmi_scores(n, min_count)
+        order = np.lexsort((-counts, -pmi))[:k]
+        return [(ngrams[i], int(counts[i]), float(pmi[i])) for i in order]
+
+    def most_common(self, n, k):
+        """The `k` most frequent n-grams as (ngram, count, pmi)."""
+        top = self.ngrams[n].most_common(k)
+        ngrams = [ngram for ngram, _ in top]
+        counts = np.array([count for _, count in top], dtype=np.int64)
+        pmi = self._pmi(n, ngrams, counts)
+        return [(ngram, int(count), float(score)) for ngram, count, score in zip(ngrams, counts, pmi)]
+
+    def _pmi(self, n, ngrams, counts):
+        """
+        log2(P(w1..wn) / (P(w1) * ... * P(wn))) for each n-gram, computed at once on count arrays.
+
+        The n-gram probability is over all n-grams and word probabilities over all tokens.
+        """
+        if not ngrams:
+            return np.zeros(0)
+        word_counts = np.array([[self.unigrams.get(word, 0) for word in ngram] for ngram in ngrams],
+                               dtype=np.float64)
+        # A word occurs at least as often as any n-gram containing it; only matters for sketch estimates
+        word_counts = np.maximum(word_counts, counts[:, None])
+        log_p_ngram = np.log2(counts / self.totals[n])
+        log_p_words = np.log2(word_counts / self.totals[1]).sum(axis=1)
+        return log_p_ngram - log_p_words
@@ -0,0 +1,118 @@
+import datetime
+import os
+import threading
+
+from .storage import INSTANCE_DIR, connect
+
+COMMIT_STORE_PATH = os.getenv("COMMIT_STORE_PATH", os.path.join(INSTANCE_DIR, "commits.sqlite3"))
+# Commits can be pushed some time after their commit date, so each delta sync
+# re-reads this much history before the high-water mark
+COMMIT_STORE_OVERLAP_HOURS = int(os.getenv("COMMIT_STORE_OVERLAP_HOURS", "24"))
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def normalize_timestamp(value):
+    """GitHub-style second-precision UTC timestamp, comparable as a string."""
+    return value[:19] + "Z"
+
+
+class CommitStore:
+    """
+    Fetched commits keyed by (user, repo, sha), plus the window synced per repo.
+
+    A repo's sync state records the oldest `since` it was fetched from and
+    when the last fetch started (the high-water mark). A later request whose
+    window starts at or after the synced start only needs commits since the
+    high-water mark; anything older comes from the store.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS commits ("
+            " user TEXT, repo TEXT, sha TEXT, message TEXT, date TEXT, additions INTEGER, deletions INTEGER,"
+            " PRIMARY KEY (user, repo, sha))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS commits_by_date ON commits (user, repo, date)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sync_state ("
+            " user TEXT, repo TEXT, synced_since TEXT, synced_at TEXT, PRIMARY KEY (user, repo))"
+        )
+
+    def fetch_since(self, user, repo, since):
+        """`since` to request from GitHub for a window starting at `since`."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_since, synced_at FROM sync_state WHERE user = ? AND repo = ?", (user or "", repo)
+            ).fetchone()
+        since = normalize_timestamp(since)
+        if row is None or row[0] > since:
+            return since
+        high_water = datetime.datetime.strptime(row[1], TIMESTAMP_FORMAT)
+        delta_since = (high_water - datetime.timedelta(hours=COMMIT_STORE_OVERLAP_HOURS)).strftime(TIMESTAMP_FORMAT)
+        return max(since, delta_since)
+
+    def add(self, user, repo, commits):
+        """Store (sha, message, date, additions, deletions) tuples."""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO commits VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(user or "", repo, *commit) for commit in commits]
+            )
+            self._conn.commit()
+
+    def known_stats(self, user, repo, shas):
+        """{sha: (additions, deletions)} for the given shas already stored."""
+        shas = list(shas)
+        if not shas:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT sha, additions, deletions FROM commits WHERE user = ? AND repo = ?"
+                f" AND sha IN ({', '.join('?' * len(shas))})",
+                (user or "", repo, *shas)
+            ).fetchall()
+        return {sha: (additions, deletions) for sha, additions, deletions in rows}
+
+    def mark_synced(self, user, repo, since, started_at):
+        """Record that everything from `since` up to `started_at` is stored."""
+        since = normalize_timestamp(since)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_since FROM sync_state WHERE user = ? AND repo = ?", (user or "", repo)
+            ).fetchone()
+            if row is not None:
+                since = min(since, row[0])
+            self._conn.execute("INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?)",
+                               (user or "", repo, since, started_at))
+            self._conn.commit()
+
+    def commits(self, user, repo, since):
+        """Stored (sha, message, date, additions, deletions) in the window, newest first."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT sha, message, date, additions, deletions FROM commits"
+                " WHERE user = ? AND repo = ? AND date >= ? ORDER BY date DESC",
+                (user or "", repo, normalize_timestamp(since))
+            ).fetchall()
+
+
+def sync_started_at():
+    return datetime.datetime.utcnow().strftime(TIMESTAMP_FORMAT)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_commit_store():
+    """Process-wide commit store, or None when COMMIT_STORE_PATH is set to an empty string."""
+    global _store
+    if not COMMIT_STORE_PATH:
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = CommitStore(COMMIT_STORE_PATH)
+    return _store
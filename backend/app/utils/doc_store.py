@@ -0,0 +1,109 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from .nlp_models import get_nlp
+from .storage import hit_ratio
+
+DOC_CACHE_SIZE = int(os.getenv("DOC_CACHE_SIZE", "10000"))  # parsed texts kept across reports, 0 disables
+DOC_BATCH_SIZE = int(os.getenv("DOC_BATCH_SIZE", "64"))  # texts per nlp.pipe batch
+DOC_PROCESSES = int(os.getenv("DOC_PROCESSES", "1"))  # nlp.pipe worker processes
+
+# Not run per text: textrank runs on whole summaries afterwards, and no analysis reads entities.
+# The lemmatizer stays, TextRank builds its graph on lemmas.
+SKIPPED_PIPES = ("textrank", "ner")
+
+
+def pipes_to_disable(nlp):
+    return [name for name in SKIPPED_PIPES if name in nlp.pipe_names]
+
+
+def text_key(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class DocCache:
+    """In-memory LRU of spaCy Docs keyed by the hash of their text."""
+
+    def __init__(self, max_entries=DOC_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0}
+        self._docs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, texts):
+        """{text: Doc} for the cached texts, counting hits and misses."""
+        found = {}
+        with self._lock:
+            for text in texts:
+                key = text_key(text)
+                if key in self._docs:
+                    self._docs.move_to_end(key)
+                    found[text] = self._docs[key]
+            self.counters["hits"] += len(found)
+            self.counters["misses"] += len(texts) - len(found)
+        return found
+
+    def put_many(self, docs):
+        """Store {text: Doc}."""
+        with self._lock:
+            for text, doc in docs.items():
+                key = text_key(text)
+                self._docs[key] = doc
+                self._docs.move_to_end(key)
+            while len(self._docs) > self.max_entries:
+                self._docs.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters, entries=len(self._docs))
+        stats["hit_ratio"] = hit_ratio(stats["hits"], stats["hits"] + stats["misses"])
+        return stats
+
+
+class DocStore:
+    """
+    spaCy parses of the texts of one report, each distinct text parsed once.
+
+    Texts not already in the process-wide DocCache go through `nlp.pipe` in
+    batches on `n_process` processes, without NER or report-level components
+    like textrank. Style analysis, classification and summarization all read
+    tokens, tags and vectors from these Docs instead of re-tokenizing the
+    texts themselves.
+    """
+
+    def __init__(self, texts, nlp=None, batch_size=DOC_BATCH_SIZE, n_process=DOC_PROCESSES):
+        self.nlp = nlp if nlp is not None else get_nlp()
+        unique = list(dict.fromkeys(texts))
+        cache = get_doc_cache()
+        self._docs = cache.get_many(unique) if cache is not None else {}
+
+        missing = [text for text in unique if text not in self._docs]
+        parsed = dict(zip(missing, self.nlp.pipe(missing, batch_size=batch_size, n_process=n_process,
+                                                 disable=pipes_to_disable(self.nlp))))
+        if cache is not None and parsed:
+            cache.put_many(parsed)
+        self._docs.update(parsed)
+
+    def __getitem__(self, text):
+        return self._docs[text]
+
+    def docs(self, texts):
+        return [self._docs[text] for text in texts]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_doc_cache():
+    """Process-wide Doc cache, or None when DOC_CACHE_SIZE is 0."""
+    global _cache
+    if DOC_CACHE_SIZE <= 0:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = DocCache()
+    return _cache
@@ -0,0 +1,123 @@
+import hashlib
+import os
+import re
+import threading
+
+from .storage import INSTANCE_DIR, SizedCache
+
+ELABORATION_CACHE_PATH = os.getenv("ELABORATION_CACHE_PATH", os.path.join(INSTANCE_DIR, "elaborations.sqlite3"))
+ELABORATION_CACHE_MAX_BYTES = int(os.getenv("ELABORATION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+def normalize_message(message):
+    """Whitespace- and case-insensitive form of a commit message."""
+    return re.sub(r"\s+", " ", message).strip().casefold()
+
+
+class ElaborationCache(SizedCache):
+    """
+    SQLite store of commit elaborations addressed by content.
+
+    Keys hash the prompt template, the model and the normalized message, so
+    "Merge branch main" is explained once for everyone until the prompt or
+    model changes. Least recently used entries go first once the stored text
+    exceeds `max_bytes`.
+    """
+    table = "elaborations"
+
+    def __init__(self, path, max_bytes=ELABORATION_CACHE_MAX_BYTES):
+        super().__init__(path, max_bytes, "key TEXT PRIMARY KEY, elaboration TEXT, size INTEGER, accessed_at REAL")
+
+    @staticmethod
+    def key(template, model, message):
+        return hashlib.sha256(f"{template}\n{model}\n{normalize_message(message)}".encode()).hexdigest()
+
+    def get_many(self, keys):
+        """{key: elaboration} for the stored keys, counting hits and misses."""
+        keys = list(set(keys))
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                found.update(self._conn.execute(
+                    f"SELECT key, elaboration FROM elaborations WHERE key IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall())
+            if found:
+                self._touch(found)
+                self._conn.commit()
+            self.counters["hits"] += len(found)
+            self.counters["misses"] += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        """Store (key, elaboration) pairs."""
+        with self._lock:
+            for key, elaboration in items:
+                self._store(key, len(elaboration.encode()), elaboration=elaboration)
+            self._conn.commit()
+
+
+def cached_elaborations(template, model, messages, elaborate, cacheable=lambda elaboration: True, on_result=None):
+    """
+    Elaborations for `messages` in order, calling `elaborate(unique_messages)` only for cache misses.
+
+    Messages that normalize to the same text are elaborated once per call even
+    with the cache disabled. Only results passing `cacheable` are stored.
+
+    With `on_result`, `on_result(index, elaboration)` is called for every
+    message as soon as its elaboration is known: cache hits first, then
+    misses as `elaborate(unique_messages, on_done)` reports them through
+    `on_done(position, elaboration)`, or when it returns.
+    """
+    cache = get_elaboration_cache()
+    keys = [ElaborationCache.key(template, model, message) for message in messages]
+    found = cache.get_many(keys) if cache is not None else {}
+
+    positions = {}
+    for i, key in enumerate(keys):
+        positions.setdefault(key, []).append(i)
+    reported = set()
+
+    def report(key, elaboration):
+        if on_result is not None and key not in reported:
+            reported.add(key)
+            for i in positions[key]:
+                on_result(i, elaboration)
+
+    for key, elaboration in found.items():
+        report(key, elaboration)
+
+    missing = {}
+    for key, message in zip(keys, messages):
+        if key not in found and key not in missing:
+            missing[key] = message
+    if missing:
+        missing_keys = list(missing)
+        if on_result is None:
+            elaborations = elaborate(list(missing.values()))
+        else:
+            elaborations = elaborate(list(missing.values()),
+                                     lambda position, elaboration: report(missing_keys[position], elaboration))
+        results = dict(zip(missing_keys, elaborations))
+        if cache is not None:
+            cache.put_many((key, text) for key, text in results.items() if cacheable(text))
+        for key, text in results.items():
+            report(key, text)
+        found.update(results)
+
+    return [found[key] for key in keys]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_elaboration_cache():
+    """Process-wide elaboration cache, or None when ELABORATION_CACHE_PATH is set to an empty string."""
+    global _cache
+    if not ELABORATION_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ElaborationCache(ELABORATION_CACHE_PATH)
+    return _cache
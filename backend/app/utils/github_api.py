@@ -0,0 +1,239 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .commit_store import sync_started_at
+from .github_cache import get_cache
+from .github_clients import get_github_clients
+from .rate_limit import get_scheduler, PRIORITY_LISTING, PRIORITY_LANGUAGES, PRIORITY_DETAIL
+
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
+GITHUB_MAX_IN_FLIGHT = int(os.getenv("GITHUB_MAX_IN_FLIGHT", "16"))
+PER_PAGE = 100
+
+
+def github_get(session, url, headers, params=None, immutable=False, priority=PRIORITY_DETAIL, cacheable=True):
+    """
+    GET a GitHub resource through the response cache: (status_code, data, next_url).
+
+    Immutable resources are answered from the cache without a request; the
+    rest are revalidated with `If-None-Match`, and a 304 (which does not count
+    against the rate limit) is answered from the cached body. Resources asked
+    for with `cacheable=False` bypass the cache. Requests that do go out are
+    admitted by the token's rate-limit scheduler at `priority`.
+    """
+    cache = get_cache() if cacheable else None
+    key = entry = None
+    request_headers = headers
+    if cache is not None:
+        key = cache.key(headers.get("Authorization", ""), url, params)
+        entry = cache.get(key)
+        if entry is not None:
+            etag, data, next_url, cached_immutable = entry
+            if cached_immutable:
+                cache.count("hits")
+                return 200, data, next_url
+            if etag:
+                request_headers = dict(headers, **{"If-None-Match": etag})
+
+    scheduler = get_scheduler(headers.get("Authorization", ""), GITHUB_MAX_IN_FLIGHT)
+    response = scheduler.get(session, url, priority, headers=request_headers, params=params)
+
+    if response.status_code == 304 and entry is not None:
+        cache.refresh(key)
+        cache.count("revalidated")
+        return 200, entry[1], entry[2]
+    if response.status_code != 200:
+        return response.status_code, None, None
+
+    next_url = response.links.get("next", {}).get("url")
+    if cache is not None:
+        cache.count("misses")
+        cache.put(key, response.headers.get("ETag"), response.text, next_url, immutable)
+    return 200, response.json(), next_url
+
+
+def fetch_languages(session, headers, owner, repo_name):
+    """Language breakdown of a repo as percentages, empty on failure."""
+    status_code, data, _ = github_get(session, f"{GITHUB_API_URL}/repos/{owner}/{repo_name}/languages", headers,
+                                   priority=PRIORITY_LANGUAGES)
+    if status_code != 200:
+        return {}
+    return language_percentages(data)
+
+
+def language_percentages(lang_bytes):
+    total_bytes = sum(lang_bytes.values())
+    return {lang: round((size / total_bytes) * 100, 2) for lang, size in lang_bytes.items()}
+
+
+def fetch_page(session, url, headers, params=None, cacheable=True):
+    """One page of a listing as (status_code, items, next_url)."""
+    status_code, items, next_url = github_get(session, url, headers, params, priority=PRIORITY_LISTING,
+                                              cacheable=cacheable)
+    if status_code != 200:
+        return status_code, [], None
+    return 200, items, next_url
+
+
+def iter_pages(session, headers, page):
+    """Yield items of a listing starting from an already fetched page, following `Link: rel="next"`."""
+    status_code, items, next_url = page
+    while True:
+        yield from items
+        if not next_url:
+            return
+        status_code, items, next_url = fetch_page(session, next_url, headers)
+
+
+def fetch_commit_stats(session, headers, commit_url):
+    """(additions, deletions) for a single commit, None on failure."""
+    # Commit details are addressed by SHA, so they never change once cached
+    status_code, data, _ = github_get(session, commit_url, headers, immutable=True)
+    if status_code != 200:
+        return None
+    stats = data.get("stats", {})
+    return stats.get("additions", 0), stats.get("deletions", 0)
+
+
+def estimate_loc_per_language(lang_data, loc_additions, loc_deletions):
+    # LOC distribution across languages (estimated, not exact per commit)
+    loc_per_language = {}
+    for lang, percent in lang_data.items():
+        loc_per_language[lang] = {
+            "estimated_additions": round((percent / 100) * loc_additions),
+            "estimated_deletions": round((percent / 100) * loc_deletions)
+        }
+    return loc_per_language
+
+
+def build_commit(message, date, repo_name, lang_data, loc_additions, loc_deletions):
+    loc_per_language = estimate_loc_per_language(lang_data, loc_additions, loc_deletions)
+
+    return {
+        "message": message,
+        "repo": repo_name,
+        "date": date,
+        "additions": loc_additions,
+        "deletions": loc_deletions,
+        "language_distribution": lang_data,  # percentages
+        "loc_per_language": loc_per_language  # estimated LOC
+    }
+
+
+def stored_commits(store, username, full_name, since, repo_name, lang_data, seen):
+    """Commits of the window kept in `store` that were not just fetched (shas in `seen`)."""
+    for sha, message, date, additions, deletions in store.commits(username, full_name, since):
+        if sha not in seen:
+            yield build_commit(message, date, repo_name, lang_data, additions, deletions)
+
+
+def stream_commits(token, username, since, max_in_flight=None, store=None):
+    """
+    Stream every commit of `username` since `since` across the token's repos.
+
+    Repo and commit listings are read page by page (`per_page=100`). Up to
+    `max_in_flight` repos are worked on ahead of the one being yielded: their
+    languages and commit pages are prefetched on a bounded thread pool and
+    commit-detail calls are queued as each page arrives, so memory stays at a
+    few pages per repo however long the history is.
+
+    With a `CommitStore`, each repo is only asked for commits since its
+    high-water mark; the fetched ones are saved and the stored remainder of
+    the window follows them.
+
+    Requests go through the token's pooled client from the client registry,
+    leased until the generator is exhausted or closed.
+
+    Returns (generator, status_code); the generator is None when the repo
+    listing fails. Commits come out in repo order, then newest first.
+    """
+    clients = get_github_clients()
+    client = clients.acquire(token, GITHUB_MAX_IN_FLIGHT)
+    session, headers = client.session, client.headers
+    max_in_flight = max_in_flight or GITHUB_MAX_IN_FLIGHT
+    started_at = sync_started_at()
+
+    try:
+        first_page = fetch_page(session, f"{GITHUB_API_URL}/user/repos", headers, {"per_page": PER_PAGE})
+    except Exception:
+        clients.release(client)
+        raise
+    if first_page[0] != 200:
+        clients.release(client)
+        return None, first_page[0]
+
+    def generate():
+        try:
+            yield from fetch_repos()
+        finally:
+            clients.release(client)
+
+    def fetch_repos():
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            pending = deque()
+            for repo in iter_pages(session, headers, first_page):
+                owner = repo["owner"]["login"]
+                full_name = f"{owner}/{repo['name']}"
+                params = {
+                    "since": store.fetch_since(username, full_name, since) if store is not None else since,
+                    "author": username,
+                    "per_page": PER_PAGE
+                }
+                pending.append((
+                    repo["name"],
+                    full_name,
+                    pool.submit(fetch_languages, session, headers, owner, repo["name"]),
+                    # `since` moves on every request, so commit pages would never be revalidated
+                    pool.submit(fetch_page, session, f"{GITHUB_API_URL}/repos/{full_name}/commits", headers, params,
+                                cacheable=False)
+                ))
+                if len(pending) >= max_in_flight:
+                    yield from drain_repo(pool, *pending.popleft())
+            while pending:
+                yield from drain_repo(pool, *pending.popleft())
+
+    def drain_repo(pool, repo_name, full_name, lang_future, page_future):
+        lang_data = lang_future.result()
+        complete = True
+        seen = set()
+        while page_future is not None:
+            status_code, items, next_url = page_future.result()
+            complete = complete and status_code == 200
+            page_future = pool.submit(fetch_page, session, next_url, headers, cacheable=False) if next_url else None
+            # Commits re-read in the overlap window already have their stats stored
+            known = store.known_stats(username, full_name, (c.get("sha") for c in items)) if store is not None else {}
+            stat_futures = [
+                None if commit.get("sha") in known else
+                pool.submit(fetch_commit_stats, session, headers, commit.get("url"))
+                for commit in items
+            ]
+            fetched = []
+            for commit, stat_future in zip(items, stat_futures):
+                message = commit.get("commit", {}).get("message", "")
+                date = commit.get("commit", {}).get("committer", {}).get("date", "")
+                stats = known[commit.get("sha")] if stat_future is None else stat_future.result()
+                if stats is None:
+                    complete = False
+                    stats = (0, 0)
+                else:
+                    fetched.append((commit.get("sha"), message, date, *stats))
+                seen.add(commit.get("sha"))
+                yield build_commit(message, date, repo_name, lang_data, *stats)
+            if store is not None:
+                store.add(username, full_name, fetched)
+
+        if store is not None:
+            if complete:
+                store.mark_synced(username, full_name, since, started_at)
+            yield from stored_commits(store, username, full_name, since, repo_name, lang_data, seen)
+
+    return generate(), 200
+
+
+def fetch_commits(token, username, since, max_in_flight=None, store=None):
+    """Same as `stream_commits`, collected into a list: (commits, status_code)."""
+    commits, status_code = stream_commits(token, username, since, max_in_flight, store)
+    if commits is None:
+        return None, status_code
+    return list(commits), status_code
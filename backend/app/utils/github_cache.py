@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .storage import INSTANCE_DIR, SizedCache
+
+GITHUB_CACHE_PATH = os.getenv("GITHUB_CACHE_PATH", os.path.join(INSTANCE_DIR, "github_cache.sqlite3"))
+GITHUB_CACHE_TTL = int(os.getenv("GITHUB_CACHE_TTL", str(7 * 24 * 3600)))  # seconds, revalidated entries only
+GITHUB_CACHE_MAX_BYTES = int(os.getenv("GITHUB_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+class ResponseCache(SizedCache):
+    """
+    SQLite store of GitHub response bodies keyed by token + URL.
+
+    Immutable entries (commit details, addressed by SHA) are served without a
+    request until evicted for space. Everything else keeps its ETag so callers
+    can revalidate with `If-None-Match`, and is dropped once older than `ttl`.
+    Least recently used entries go first when the bodies exceed `max_bytes`.
+    """
+    table = "responses"
+    hit_outcomes = ("hits", "revalidated")
+
+    def __init__(self, path, ttl=GITHUB_CACHE_TTL, max_bytes=GITHUB_CACHE_MAX_BYTES):
+        super().__init__(path, max_bytes,
+                         "key TEXT PRIMARY KEY, etag TEXT, body TEXT, next_url TEXT, immutable INTEGER,"
+                         " size INTEGER, fetched_at REAL, accessed_at REAL")
+        self.ttl = ttl
+
+    @staticmethod
+    def key(token, url, params=None):
+        query = json.dumps(sorted((params or {}).items()))
+        return hashlib.sha256(f"{token}\n{url}\n{query}".encode()).hexdigest()
+
+    def get(self, key):
+        """(etag, data, next_url, immutable) for a live entry, else None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, body, next_url, immutable, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            etag, body, next_url, immutable, fetched_at = row
+            if not immutable and now - fetched_at > self.ttl:
+                self._delete(key)
+                self._conn.commit()
+                return None
+            self._touch([key], now)
+            self._conn.commit()
+        return etag, json.loads(body), next_url, bool(immutable)
+
+    def put(self, key, etag, body, next_url=None, immutable=False):
+        with self._lock:
+            self._store(key, len(body), etag=etag, body=body, next_url=next_url, immutable=int(immutable),
+                        fetched_at=time.time())
+            self._conn.commit()
+
+    def refresh(self, key):
+        """Mark a revalidated (304) entry as fresh again."""
+        with self._lock:
+            now = time.time()
+            self._conn.execute("UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+            self._conn.commit()
+
+    def _evict(self):
+        # Expired entries go first, whenever they were last read
+        cutoff = time.time() - self.ttl
+        self.counters["evictions"] += self._delete_where("immutable = 0 AND fetched_at < ?", (cutoff,))
+        super()._evict()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide response cache, or None when GITHUB_CACHE_PATH is set to an empty string."""
+    global _cache
+    if not GITHUB_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(GITHUB_CACHE_PATH)
+    return _cache
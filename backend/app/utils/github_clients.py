@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .metrics import instrument_session
+from .rate_limit import get_scheduler, drop_scheduler
+
+GITHUB_CLIENTS_MAX = int(os.getenv("GITHUB_CLIENTS_MAX", "64"))  # idle per-token clients kept
+GITHUB_CLIENT_IDLE_TTL = int(os.getenv("GITHUB_CLIENT_IDLE_TTL", "900"))  # seconds an unused client is kept
+
+
+def github_headers(token):
+    return {
+        "Authorization": f"token {token}",
+        "Accept": "application/vnd.github+json"
+    }
+
+
+def new_session(pool_size):
+    """requests session with a keep-alive pool of `pool_size` connections per host."""
+    session = instrument_session(requests.Session())
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class GitHubClient:
+    """
+    Keep-alive connection pool and rate-limit schedulers of one GitHub token.
+
+    The schedulers are the ones `get_scheduler` hands out for the token's
+    REST and GraphQL requests, so the budget tracked here is the budget the
+    requests are admitted against.
+    """
+
+    def __init__(self, token, max_in_flight):
+        self.token = token
+        self.headers = github_headers(token)
+        self.session = new_session(max_in_flight)
+        self.scheduler_keys = (self.headers["Authorization"], self.headers["Authorization"] + " graphql")
+        self.schedulers = [get_scheduler(key, max_in_flight) for key in self.scheduler_keys]
+        self.leases = 0
+        self.last_used = time.monotonic()
+
+    def close(self):
+        self.session.close()
+        for key in self.scheduler_keys:
+            drop_scheduler(key)
+
+
+class GitHubClientRegistry:
+    """
+    Per-token GitHub clients, reused across requests of the same user.
+
+    A client is leased for the duration of a fetch. Once released it stays
+    open for the user's next report; beyond `max_clients`, or after
+    `idle_ttl` seconds unused, released clients are closed least recently
+    used first. Leased clients are never evicted.
+    """
+
+    def __init__(self, max_clients=GITHUB_CLIENTS_MAX, idle_ttl=GITHUB_CLIENT_IDLE_TTL):
+        self.max_clients = max_clients
+        self.idle_ttl = idle_ttl
+        self.counters = {"created": 0, "reused": 0, "evictions": 0}
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, token, max_in_flight):
+        with self._lock:
+            client = self._clients.get(token)
+            if client is None:
+                client = self._clients[token] = GitHubClient(token, max_in_flight)
+                self.counters["created"] += 1
+            else:
+                self._clients.move_to_end(token)
+                self.counters["reused"] += 1
+            client.leases += 1
+            return client
+
+    def release(self, client):
+        with self._lock:
+            client.leases -= 1
+            client.last_used = time.monotonic()
+            self._evict()
+
+    def _evict(self):
+        now = time.monotonic()
+        for token, client in list(self._clients.items()):
+            if client.leases:
+                continue
+            if len(self._clients) > self.max_clients or now - client.last_used > self.idle_ttl:
+                del self._clients[token]
+                client.close()
+                self.counters["evictions"] += 1
+
+    def stats(self):
+        with self._lock:
+            self._evict()
+            return dict(self.counters, clients=len(self._clients),
+                        leased=sum(1 for client in self._clients.values() if client.leases),
+                        rate_limits=[client.schedulers[0].stats() for client in self._clients.values()])
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_github_clients():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = GitHubClientRegistry()
+    return _registry
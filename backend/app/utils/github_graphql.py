@@ -0,0 +1,176 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from . import github_api
+from .commit_store import sync_started_at
+from .github_api import fetch_page, iter_pages, language_percentages, build_commit, stored_commits, PER_PAGE
+from .github_clients import get_github_clients
+from .rate_limit import get_scheduler, PRIORITY_LISTING
+
+GITHUB_GRAPHQL_REPOS_PER_QUERY = int(os.getenv("GITHUB_GRAPHQL_REPOS_PER_QUERY", "10"))
+
+USER_QUERY = "query($login: String!) { user(login: $login) { id } }"
+
+REPO_FIELDS = """
+  r{i}: repository(owner: $owner{i}, name: $name{i}) {{
+    languages(first: 100, orderBy: {{field: SIZE, direction: DESC}}) {{ edges {{ size node {{ name }} }} }}
+    defaultBranchRef {{
+      target {{
+        ... on Commit {{
+          history(first: 100, since: $since{i}, author: $author, after: $after{i}) {{
+            pageInfo {{ hasNextPage endCursor }}
+            nodes {{ oid message committedDate additions deletions }}
+          }}
+        }}
+      }}
+    }}
+  }}"""
+
+
+def history_query(count):
+    """One query aliasing `count` repositories as r0..r{count-1}."""
+    variables = ", ".join(f"$owner{i}: String!, $name{i}: String!, $since{i}: GitTimestamp, $after{i}: String"
+                          for i in range(count))
+    fields = "".join(REPO_FIELDS.format(i=i) for i in range(count))
+    return f"query($author: CommitAuthor, {variables}) {{{fields}\n}}"
+
+
+def graphql(session, headers, query, variables):
+    """POST a GraphQL query: (status_code, data)."""
+    scheduler = get_scheduler(headers.get("Authorization", "") + " graphql", github_api.GITHUB_MAX_IN_FLIGHT)
+    response = scheduler.request(session, "POST", f"{github_api.GITHUB_API_URL}/graphql", PRIORITY_LISTING,
+                                 headers=headers, json={"query": query, "variables": variables})
+    if response.status_code != 200:
+        return response.status_code, None
+    body = response.json()
+    if body.get("data") is None:
+        return 502, None
+    return 200, body["data"]
+
+
+def resolve_author(session, headers, username):
+    """CommitAuthor filter for `username`: (status_code, author). author is None for unknown users."""
+    if not username:
+        return 200, None
+    status_code, data = graphql(session, headers, USER_QUERY, {"login": username})
+    if status_code != 200 or not data.get("user"):
+        return status_code, None
+    return 200, {"id": data["user"]["id"]}
+
+
+def fetch_history_batch(session, headers, repos, author):
+    """
+    Languages and every matching commit of up to GITHUB_GRAPHQL_REPOS_PER_QUERY repos.
+
+    `repos` holds (owner, name, since) tuples. Each round asks for the next
+    100 commits of every repo that still has pages left, so a batch costs as
+    many queries as its longest history has pages. Returns
+    [(lang_data, commit_nodes, complete)] in the order of `repos`.
+    """
+    results = [(None, []) for _ in repos]
+    cursors = {i: None for i in range(len(repos))}
+    while cursors:
+        pending = list(cursors)
+        variables = {"author": author}
+        for alias, i in enumerate(pending):
+            owner, name, since = repos[i]
+            variables.update({f"owner{alias}": owner, f"name{alias}": name, f"since{alias}": since,
+                              f"after{alias}": cursors[i]})
+        status_code, data = graphql(session, headers, history_query(len(pending)), variables)
+        if status_code != 200:
+            break
+
+        cursors = {}
+        for alias, i in enumerate(pending):
+            repo = data.get(f"r{alias}") or {}
+            lang_data, nodes = results[i]
+            if lang_data is None:
+                edges = (repo.get("languages") or {}).get("edges", [])
+                lang_data = language_percentages({edge["node"]["name"]: edge["size"] for edge in edges})
+            target = (repo.get("defaultBranchRef") or {}).get("target") or {}
+            history = target.get("history") or {"nodes": [], "pageInfo": {}}
+            results[i] = (lang_data, nodes + history["nodes"])
+            if history["pageInfo"].get("hasNextPage"):
+                cursors[i] = history["pageInfo"]["endCursor"]
+
+    # Repos still holding a cursor were cut short by a failed query
+    return [(lang_data or {}, nodes, i not in cursors) for i, (lang_data, nodes) in enumerate(results)]
+
+
+def stream_commits_graphql(token, username, since, max_in_flight=None, store=None):
+    """
+    GraphQL counterpart of `github_api.stream_commits`, with identical output.
+
+    Repos are still listed over REST (same set and order), but their
+    languages and commit history, additions and deletions included, come
+    from batched `history(since:, author:)` queries, replacing the one REST
+    call per commit. Up to `max_in_flight` batches run concurrently. A
+    `CommitStore` and the token's pooled client are used the same way as by
+    the REST path.
+    """
+    clients = get_github_clients()
+    client = clients.acquire(token, github_api.GITHUB_MAX_IN_FLIGHT)
+    session, headers = client.session, client.headers
+    max_in_flight = max_in_flight or github_api.GITHUB_MAX_IN_FLIGHT
+    started_at = sync_started_at()
+
+    try:
+        first_page = fetch_page(session, f"{github_api.GITHUB_API_URL}/user/repos", headers, {"per_page": PER_PAGE})
+        status_code, author = resolve_author(session, headers, username) if first_page[0] == 200 else (None, None)
+    except Exception:
+        clients.release(client)
+        raise
+    if first_page[0] != 200:
+        clients.release(client)
+        return None, first_page[0]
+    if status_code != 200:
+        clients.release(client)
+        return None, status_code
+    if username and author is None:
+        clients.release(client)
+        return iter(()), 200  # the REST `author` filter matches nothing for unknown users too
+
+    def generate():
+        try:
+            yield from fetch_repos()
+        finally:
+            clients.release(client)
+
+    def fetch_repos():
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            pending = deque()
+            batch = []
+            for repo in iter_pages(session, headers, first_page):
+                owner = repo["owner"]["login"]
+                repo_since = since
+                if store is not None:
+                    repo_since = store.fetch_since(username, f"{owner}/{repo['name']}", since)
+                batch.append((owner, repo["name"], repo_since))
+                if len(batch) == GITHUB_GRAPHQL_REPOS_PER_QUERY:
+                    pending.append((batch, pool.submit(fetch_history_batch, session, headers, batch, author)))
+                    batch = []
+                    if len(pending) >= max_in_flight:
+                        yield from drain_batch(*pending.popleft())
+            if batch:
+                pending.append((batch, pool.submit(fetch_history_batch, session, headers, batch, author)))
+            while pending:
+                yield from drain_batch(*pending.popleft())
+
+    def drain_batch(batch, future):
+        for (owner, name, _), (lang_data, nodes, complete) in zip(batch, future.result()):
+            for node in nodes:
+                yield build_commit(node["message"], node["committedDate"], name, lang_data,
+                                   node["additions"], node["deletions"])
+            if store is not None:
+                full_name = f"{owner}/{name}"
+                store.add(username, full_name, [
+                    (node["oid"], node["message"], node["committedDate"], node["additions"], node["deletions"])
+                    for node in nodes
+                ])
+                if complete:
+                    store.mark_synced(username, full_name, since, started_at)
+                seen = {node["oid"] for node in nodes}
+                yield from stored_commits(store, username, full_name, since, name, lang_data, seen)
+
+    return generate(), 200
@@ -1,8 +1,15 @@
 import jwt
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 SECRET_KEY = os.getenv("SECRET_KEY")
+JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "1024"))  # verified tokens remembered, 0 disables
+
+_verified = OrderedDict()
+_verified_lock = threading.Lock()
 
 
 def create_jwt(user_data, access_token):
@@ -15,10 +22,29 @@ def create_jwt(user_data, access_token):
     return jwt.encode(payload, SECRET_KEY, algorithm="HS256")
 
 
-def decode_jwt(token):
+def verify_jwt(token):
+    """
+    Payload of a valid, unexpired token, else None.
+
+    Tokens whose signature was already verified are answered from an LRU of
+    `JWT_CACHE_SIZE` entries until their `exp`, so the HMAC check runs once
+    per token rather than once per request.
+    """
+    with _verified_lock:
+        payload = _verified.get(token)
+        if payload is not None:
+            if payload["exp"] > time.time():
+                _verified.move_to_end(token)
+                return payload
+            del _verified[token]
+
     try:
-        return jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-    except jwt.ExpiredSignatureError:
-        return {"error": "Token expired"}
+        payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"], options={"require": ["exp"]})
     except jwt.InvalidTokenError:
-        return {"error": "Invalid token"}
+        return None
+    if JWT_CACHE_SIZE > 0:
+        with _verified_lock:
+            _verified[token] = payload
+            while len(_verified) > JWT_CACHE_SIZE:
+                _verified.popitem(last=False)
+    return payload
@@ -0,0 +1,170 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+Every process keeps its own values, so with several gunicorn workers each
+scrape sees one worker; aggregate them with `sum` in PromQL. Collectors
+registered with `add_collector` are called at render time for values that
+already live elsewhere, like cache counters.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self):
+        """(suffix, labels, value) for every series."""
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield "", dict(zip(self.labelnames, key)), value
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in items:
+            labels = dict(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets, counts):
+                yield "_bucket", dict(labels, le=_number(bound)), count
+            yield "_count", labels, counts[-1]
+            yield "_sum", labels, total
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """`collector()` yields Metric objects filled in at render time."""
+        self._collectors.append(collector)
+
+    def render(self):
+        metrics = list(self._metrics)
+        for collector in self._collectors:
+            metrics.extend(collector())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_seconds", "Time to handle a request, up to the response headers.", ["endpoint", "method", "status"]))
+REPORT_STAGE_SECONDS = REGISTRY.register(Histogram(
+    "report_stage_seconds", "Duration of each report stage, and of the GitHub fetch behind /report/commit.",
+    ["stage"]))
+OUTBOUND_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "outbound_request_seconds", "Outbound HTTP calls (GitHub, Gemini) by host, up to the response headers.",
+    ["host", "status"]))
+OUTBOUND_ERRORS = REGISTRY.register(Counter(
+    "outbound_errors_total", "Outbound HTTP calls that got no response.", ["host", "error"]))
+MODEL_LOAD_SECONDS = REGISTRY.register(Gauge(
+    "model_load_seconds", "Time the last load of each model took in this process.", ["model"]))
+
+
+@contextmanager
+def model_load(model):
+    start = time.perf_counter()
+    yield
+    MODEL_LOAD_SECONDS.set(round(time.perf_counter() - start, 4), model=model)
+
+
+def _observe_response(response, *args, **kwargs):
+    OUTBOUND_REQUEST_SECONDS.observe(response.elapsed.total_seconds(), host=urlparse(response.url).hostname,
+                                     status=response.status_code)
+
+
+def instrument_session(session):
+    """Record the latency of every response a requests session receives."""
+    session.hooks["response"].append(_observe_response)
+    return session
+
+
+def observe_outbound_error(url, error):
+    OUTBOUND_ERRORS.inc(host=urlparse(url).hostname, error=type(error).__name__)
@@ -0,0 +1,164 @@
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .elaboration_cache import cached_elaborations
+from .metrics import instrument_session, observe_outbound_error
+
+GEMINI_API_URL = os.getenv(
+    "GEMINI_API_URL",
+    "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
+)
+API_KEY = os.getenv("T5-API")
+LLM_WORKERS = int(os.getenv("LLM_WORKERS", "8"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))  # seconds per call
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "1"))  # commits per prompt, 1 disables batching
+
+PROMPT_TEMPLATE = "Explain the commit message in 40 words: {message}"
+BATCH_PROMPT_TEMPLATE = (
+    "Explain each of the following commit messages in 40 words. "
+    "Answer with a JSON array of exactly {count} strings, one explanation per message, in the same order.\n\n"
+    "{messages}"
+)
+NO_EXPLANATION = "No explanation available."
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = instrument_session(requests.Session())
+            adapter = HTTPAdapter(pool_maxsize=LLM_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+
+def error_elaboration(reason):
+    return f"Error: {reason}, Unable to explain message."
+
+
+def generate_content(prompt, timeout=LLM_TIMEOUT, json_output=False):
+    """Call Gemini with one user prompt: (text, error). text is None on failure."""
+    payload = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+    if json_output:
+        payload["generationConfig"] = {"responseMimeType": "application/json"}
+    try:
+        response = get_session().post(
+            f"{GEMINI_API_URL}?key={API_KEY}",
+            json=payload,
+            headers={"Content-Type": "application/json"},
+            timeout=timeout
+        )
+    except requests.Timeout as e:
+        observe_outbound_error(GEMINI_API_URL, e)
+        return None, "timeout"
+    except requests.RequestException as e:
+        observe_outbound_error(GEMINI_API_URL, e)
+        return None, e.__class__.__name__
+
+    if response.status_code != 200:
+        return None, response.status_code
+    res_json = response.json()
+    text = (
+        res_json.get("candidates", [{}])[0]
+        .get("content", {})
+        .get("parts", [{}])[0]
+        .get("text", NO_EXPLANATION)
+    )
+    return text, None
+
+
+def elaborate_message(message, timeout=LLM_TIMEOUT):
+    text, error = generate_content(PROMPT_TEMPLATE.format(message=message), timeout)
+    return error_elaboration(error) if text is None else text
+
+
+def parse_batch_answer(text, count):
+    """The list of `count` strings in a batch answer, or None if it doesn't parse."""
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    try:
+        answers = json.loads(text)
+    except ValueError:
+        return None
+    if not isinstance(answers, list) or len(answers) != count:
+        return None
+    return [answer if isinstance(answer, str) and answer.strip() else NO_EXPLANATION for answer in answers]
+
+
+def elaborate_batch(messages, timeout=LLM_TIMEOUT):
+    """Explain several messages with a single prompt, falling back to one call each if the answer is unusable."""
+    numbered = "\n".join(f"{i + 1}. {json.dumps(message)}" for i, message in enumerate(messages))
+    prompt = BATCH_PROMPT_TEMPLATE.format(count=len(messages), messages=numbered)
+    text, error = generate_content(prompt, timeout, json_output=True)
+    answers = parse_batch_answer(text, len(messages)) if text is not None else None
+    if answers is None:
+        return [elaborate_message(message, timeout) for message in messages]
+    return answers
+
+
+def is_cacheable(elaboration):
+    return elaboration != NO_EXPLANATION and not elaboration.startswith("Error: ")
+
+
+def gemini_model():
+    match = re.search(r"/models/([^/:]+)", GEMINI_API_URL)
+    return match.group(1) if match else GEMINI_API_URL
+
+
+def prompt_template(batch_size):
+    """The prompt elaborations are asked with, batched or one message per call."""
+    return BATCH_PROMPT_TEMPLATE if batch_size > 1 else PROMPT_TEMPLATE
+
+
+def elaboration_version():
+    """Everything besides the messages that shapes an elaboration."""
+    return [prompt_template(LLM_BATCH_SIZE), gemini_model()]
+
+
+def elaborate_messages(messages, workers=LLM_WORKERS, timeout=LLM_TIMEOUT, batch_size=LLM_BATCH_SIZE, on_result=None):
+    """
+    Elaborations for `messages`, in order.
+
+    Messages already explained by the same prompt (batched or not) and model
+    come from the elaboration cache. The rest are sent on a pool of `workers` threads, each
+    call bounded by `timeout`. With `batch_size` > 1, that many messages share
+    a prompt and the model answers with a JSON array. Failed calls produce the
+    usual "Error: ..." string instead of failing the report, and are not cached.
+    `on_result(index, elaboration)` is called as each message's call returns.
+    """
+    def elaborate(missing, on_done=None):
+        return elaborate_uncached(missing, workers, timeout, batch_size, on_done)
+
+    return cached_elaborations(prompt_template(batch_size), gemini_model(), messages, elaborate, is_cacheable,
+                               on_result)
+
+
+def elaborate_uncached(messages, workers, timeout, batch_size, on_done=None):
+    if not messages:
+        return []
+
+    def elaborate_chunk(chunk):
+        if batch_size <= 1:
+            return [elaborate_message(chunk[0], timeout)]
+        return elaborate_batch(chunk, timeout)
+
+    step = max(batch_size, 1)
+    elaborations = [None] * len(messages)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(elaborate_chunk, messages[i:i + step]): i for i in range(0, len(messages), step)}
+        for future in as_completed(futures):
+            for offset, elaboration in enumerate(future.result()):
+                elaborations[futures[future] + offset] = elaboration
+                if on_done is not None:
+                    on_done(futures[future] + offset, elaboration)
+    return elaborations
@@ -0,0 +1,99 @@
+import os
+import threading
+
+from .metrics import model_load
+
+SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_lg")
+
+# NLTK resources used by word_tokenize and pos_tag; install them with
+#   python -m nltk.downloader punkt punkt_tab averaged_perceptron_tagger averaged_perceptron_tagger_eng
+NLTK_RESOURCES = {
+    "punkt": "tokenizers/punkt",
+    "punkt_tab": "tokenizers/punkt_tab",
+    "averaged_perceptron_tagger": "taggers/averaged_perceptron_tagger",
+    "averaged_perceptron_tagger_eng": "taggers/averaged_perceptron_tagger_eng",
+}
+
+WARMABLE_MODELS = ("nltk", "spacy", "t5", "classifier")
+
+_nlp = None
+_nlp_lock = threading.Lock()
+_nltk_checked = False
+_nltk_lock = threading.Lock()
+
+
+def get_nlp():
+    """Process-wide spaCy pipeline with textrank, loaded on first use."""
+    global _nlp
+    with _nlp_lock:
+        if _nlp is None:
+            with model_load("spacy"):
+                import spacy
+                import pytextrank  # noqa: F401 - registers the "textrank" factory
+
+                nlp = spacy.load(SPACY_MODEL)
+                nlp.add_pipe("textrank")
+            _nlp = nlp
+    return _nlp
+
+
+def spacy_version():
+    """Installed spaCy and SPACY_MODEL versions, read without importing spaCy."""
+    from importlib.metadata import version, PackageNotFoundError
+
+    versions = []
+    for package in ("spacy", "pytextrank", SPACY_MODEL):
+        try:
+            versions.append(f"{package}=={version(package)}")
+        except PackageNotFoundError:
+            versions.append(package)
+    return versions
+
+
+def ensure_nltk_data():
+    """
+    Check once per process that the NLTK resources are installed.
+
+    Nothing is downloaded: a missing resource raises LookupError naming the
+    downloader command, instead of every worker hitting the network on boot.
+    """
+    global _nltk_checked
+    if _nltk_checked:
+        return
+    with _nltk_lock:
+        if _nltk_checked:
+            return
+        import nltk
+
+        missing = []
+        for name, path in NLTK_RESOURCES.items():
+            try:
+                nltk.data.find(path)
+            except LookupError:
+                missing.append(name)
+        if missing:
+            raise LookupError(f"Missing NLTK data, install it with: python -m nltk.downloader {' '.join(missing)}")
+        _nltk_checked = True
+
+
+def warm_up(models=WARMABLE_MODELS):
+    """
+    Load `models` (any of "nltk", "spacy", "t5", "classifier") now instead of on first request.
+
+    Meant for a gunicorn `post_fork` hook or the WARM_UP_MODELS setting. The
+    T5 worker process is started and has loaded its model when this returns.
+    """
+    unknown = set(models) - set(WARMABLE_MODELS)
+    if unknown:
+        raise ValueError(f"Unknown models to warm up: {', '.join(sorted(unknown))}")
+    if "nltk" in models:
+        ensure_nltk_data()
+    if "spacy" in models:
+        get_nlp()
+    if "t5" in models:
+        from .t5_worker import get_t5_worker
+        with model_load("t5"):
+            get_t5_worker().warm_up()
+    if "classifier" in models:
+        from .commit_classifier import get_commit_classifier
+        get_commit_classifier()
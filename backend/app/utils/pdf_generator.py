@@ -0,0 +1,222 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+
+from .storage import INSTANCE_DIR
+
+PDF_CACHE_DIR = os.getenv("PDF_CACHE_DIR", os.path.join(INSTANCE_DIR, "pdf"))
+PDF_CACHE_TTL = int(os.getenv("PDF_CACHE_TTL", "3600"))  # seconds rendered PDFs and chart images are kept
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_CHUNK_COMMITS = int(os.getenv("PDF_CHUNK_COMMITS", "500"))  # commits rendered per part file
+
+
+def report_key(report):
+    """Content hash of a report, naming its PDF and chart images."""
+    return hashlib.sha256(json.dumps(report, sort_keys=True, default=str).encode()).hexdigest()[:32]
+
+
+def _styles():
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    return getSampleStyleSheet()
+
+
+def _build(path, flowables, title):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate
+
+    def footer(canvas, doc):
+        canvas.saveState()
+        canvas.setFont("Helvetica", 8)
+        canvas.drawCentredString(letter[0] / 2, 0.4 * inch, title)
+        canvas.restoreState()
+
+    doc = SimpleDocTemplate(path, pagesize=letter, leftMargin=0.6 * inch, rightMargin=0.6 * inch,
+                            topMargin=0.6 * inch, bottomMargin=0.6 * inch, title=title)
+    doc.build(flowables, onFirstPage=footer, onLaterPages=footer)
+
+
+def language_chart(path, commits, title):
+    """Bar chart of lines added and deleted per language, written to `path` unless it already exists."""
+    if os.path.exists(path):
+        return path
+    # An explicit Figure on the Agg canvas, not pyplot: this runs on request threads
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    additions, deletions = defaultdict(float), defaultdict(float)
+    for commit in commits:
+        for language, stats in (commit.get("loc_per_language") or {}).items():
+            additions[language] += stats.get("estimated_additions") or 0
+            deletions[language] += stats.get("estimated_deletions") or 0
+    if not additions:
+        return None
+
+    languages = sorted(additions, key=lambda language: -(additions[language] + deletions[language]))[:12]
+    figure = Figure(figsize=(7, 2.8), dpi=100)
+    FigureCanvasAgg(figure)
+    axes = figure.subplots()
+    positions = range(len(languages))
+    axes.bar([p - 0.2 for p in positions], [additions[language] for language in languages], 0.4,
+             label="added", color="#16a34a")
+    axes.bar([p + 0.2 for p in positions], [deletions[language] for language in languages], 0.4,
+             label="deleted", color="#dc2626")
+    axes.set_xticks(list(positions), languages, rotation=30, ha="right", fontsize=8)
+    axes.set_title(title, fontsize=10)
+    axes.legend(fontsize=8)
+    figure.tight_layout()
+    tmp_path = f"{path}.{os.getpid()}.tmp.png"
+    figure.savefig(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _chart_flowable(path):
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Image
+
+    return Image(path, width=7 * inch, height=2.8 * inch)
+
+
+def render_overview(path, report, chart_dir):
+    """Title page: summary, style analysis, collocations and the overall language chart."""
+    from reportlab.platypus import Paragraph, Spacer, ListFlowable
+
+    styles = _styles()
+    flowables = [Paragraph("Code Contribution Report", styles["Title"])]
+    sections = [
+        ("Summary", [escape(str(point)) for point in report.get("summarization") or []]),
+        ("Commit Analysis", [f"<b>{escape(str(repo))}</b>: {escape(str(text))}"
+                             for repo, text in (report.get("analysis") or {}).items()]),
+        ("Top Bigrams", [f"{escape(item['bigram'])} (count {item['count']}, PMI {item['pmi']:.2f})"
+                         for item in (report.get("patterns_analysis") or {}).get("top_bigrams", [])]),
+    ]
+    for heading, items in sections:
+        if items:
+            flowables.append(Paragraph(heading, styles["Heading2"]))
+            flowables.append(ListFlowable([Paragraph(item, styles["BodyText"]) for item in items],
+                                          bulletType="bullet"))
+    chart = language_chart(os.path.join(chart_dir, "overview.png"), report.get("elaborated_commits") or [],
+                           "Lines changed per language")
+    if chart:
+        flowables += [Spacer(1, 12), _chart_flowable(chart)]
+    _build(path, flowables, "Code Contribution Report")
+    return path
+
+
+def render_commits(path, repo, commits, first_index, chart_path=None):
+    """One part of a repo section: an optional heading and chart, then one block per commit."""
+    from reportlab.platypus import Paragraph, Spacer, KeepTogether
+
+    styles = _styles()
+    flowables = []
+    if chart_path is not None:
+        flowables.append(Paragraph(f"Repository: {escape(str(repo))}", styles["Heading1"]))
+        chart = language_chart(chart_path, commits, f"{repo}: lines changed per language")
+        if chart:
+            flowables += [_chart_flowable(chart), Spacer(1, 12)]
+    for offset, commit in enumerate(commits):
+        lines = [
+            Paragraph(f"Commit #{first_index + offset + 1}", styles["Heading3"]),
+            Paragraph(f"<b>Original:</b> {escape(str(commit.get('original')))}", styles["BodyText"]),
+            Paragraph(f"<b>Elaboration:</b> <i>{escape(str(commit.get('elaboration')))}</i>", styles["BodyText"]),
+            Paragraph(f"<b>Date:</b> {escape(str(commit.get('date')))} &nbsp; <b>Category:</b> "
+                      f"{escape(str(commit.get('category', '-')))} &nbsp; "
+                      f"<font color='green'>+{commit.get('additions')}</font> / "
+                      f"<font color='red'>-{commit.get('deletions')}</font>", styles["BodyText"]),
+        ]
+        flowables.append(KeepTogether(lines))
+    _build(path, flowables, f"Code Contribution Report - {repo}")
+    return path
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def purge_expired(cache_dir=PDF_CACHE_DIR, ttl=PDF_CACHE_TTL):
+    cutoff = time.time() - ttl
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        # Another worker may be purging the same directory
+        try:
+            if os.path.getmtime(path) >= cutoff:
+                continue
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+        except FileNotFoundError:
+            continue
+
+
+def render_report_pdf(report, cache_dir=PDF_CACHE_DIR, workers=PDF_WORKERS, chunk_commits=PDF_CHUNK_COMMITS):
+    """
+    Path of the PDF for a /report/generate result, rendering it unless already cached.
+
+    Each repo's commits, in parts of `chunk_commits`, are rendered to separate
+    temporary files on a process pool when there is more than one part, so
+    no process lays out more than one part's pages; the overview renders
+    meanwhile in this process. The parts are then appended into the final
+    file. Chart images live next to it, keyed by the report hash, and are
+    reused on re-render.
+    """
+    from pypdf import PdfWriter
+
+    os.makedirs(cache_dir, exist_ok=True)
+    purge_expired(cache_dir)
+    key = report_key(report)
+    path = os.path.join(cache_dir, f"{key}.pdf")
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+    chart_dir = os.path.join(cache_dir, f"{key}-charts")
+    os.makedirs(chart_dir, exist_ok=True)
+    os.utime(chart_dir)
+
+    by_repo = defaultdict(list)
+    for commit in report.get("elaborated_commits") or []:
+        by_repo[commit.get("repo")].append(commit)
+
+    with tempfile.TemporaryDirectory(dir=cache_dir) as tmp:
+        tasks = []
+        for r, (repo, commits) in enumerate(by_repo.items()):
+            for start in range(0, len(commits), chunk_commits):
+                chart_path = os.path.join(chart_dir, f"repo-{r}.png") if start == 0 else None
+                tasks.append((os.path.join(tmp, f"{r:04d}-{start:08d}.pdf"), repo, commits[start:start + chunk_commits],
+                              start, chart_path))
+
+        if workers <= 1 or len(tasks) <= 1:
+            parts = [render_overview(os.path.join(tmp, "overview.pdf"), report, chart_dir)]
+            parts += [render_commits(*task) for task in tasks]
+        else:
+            futures = [_executor().submit(render_commits, *task) for task in tasks]
+            # The overview needs every commit for its chart, so it renders here while the workers run
+            parts = [render_overview(os.path.join(tmp, "overview.pdf"), report, chart_dir)]
+            parts += [future.result() for future in futures]
+
+        writer = PdfWriter()
+        for part in parts:
+            writer.append(part)
+        tmp_path = os.path.join(tmp, "report.pdf")
+        with open(tmp_path, "wb") as f:
+            writer.write(f)
+        os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,54 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+REPORT_STAGE_WORKERS = int(os.getenv("REPORT_STAGE_WORKERS", "4"))
+
+
+def run_stages(stages, workers=REPORT_STAGE_WORKERS, on_start=None):
+    """
+    Run a dependency graph of stages on a thread pool, each as soon as its inputs are ready.
+
+    `stages` maps a stage name to `(fn, dependencies)`; `fn` is called with
+    the results of its dependencies as keyword arguments. `on_start(name)` is
+    called as each stage is scheduled. Returns `(results, timings)`, both
+    keyed by stage name, timings in seconds. The first stage to fail raises
+    its exception once the stages already running have finished.
+    """
+    unknown = {dep for _, deps in stages.values() for dep in deps} - set(stages)
+    if unknown:
+        raise ValueError(f"Unknown stage dependencies: {', '.join(sorted(unknown))}")
+
+    results, timings = {}, {}
+    pending = dict(stages)
+    running = {}
+
+    def timed(name, fn, kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(**kwargs)
+        finally:
+            timings[name] = round(time.perf_counter() - start, 4)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-stage") as pool:
+        while pending or running:
+            for name, (fn, deps) in list(pending.items()):
+                if all(dep in results for dep in deps):
+                    del pending[name]
+                    if on_start is not None:
+                        on_start(name)
+                    running[pool.submit(timed, name, fn, {dep: results[dep] for dep in deps})] = name
+            if not running:
+                raise ValueError(f"Stage dependencies form a cycle: {', '.join(sorted(pending))}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    pending.clear()
+                    for other in running:
+                        other.cancel()
+                    wait(running)
+                    raise error
+                results[name] = future.result()
+    return results, timings
@@ -0,0 +1,190 @@
+import heapq
+import itertools
+import math
+import os
+import random
+import threading
+import time
+
+import requests
+
+from .metrics import observe_outbound_error
+
+GITHUB_RETRIES = int(os.getenv("GITHUB_RETRIES", "5"))
+GITHUB_BACKOFF_BASE = float(os.getenv("GITHUB_BACKOFF_BASE", "1"))  # seconds
+GITHUB_BACKOFF_MAX = float(os.getenv("GITHUB_BACKOFF_MAX", "60"))  # longest wait before giving up
+
+# Lower value goes first when requests are queued
+PRIORITY_LISTING = 0
+PRIORITY_LANGUAGES = 1
+PRIORITY_DETAIL = 2
+
+RETRY_STATUSES = {403, 429, 500, 502, 503, 504}
+
+
+class RateLimitScheduler:
+    """
+    Admission control for the requests made with one GitHub token.
+
+    Tracks the budget reported in `X-RateLimit-*` headers and lets fewer
+    requests run at once as it drains (all of them above half the budget, one
+    at a time near zero). When the budget is spent, or GitHub answers with a
+    secondary limit, every request for the token waits until the reset or
+    `Retry-After`, unless that is more than `backoff_max` away: then requests
+    are answered at once with a local 429 instead of holding their caller.
+    Failed requests are retried with jittered exponential backoff. Queued
+    requests are admitted by priority, then arrival.
+    """
+
+    def __init__(self, max_in_flight, retries=GITHUB_RETRIES, backoff_base=GITHUB_BACKOFF_BASE,
+                 backoff_max=GITHUB_BACKOFF_MAX):
+        self.max_in_flight = max_in_flight
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.remaining = None
+        self.limit = None
+        self.reset_at = 0.0
+        self.paused_until = 0.0
+        self.in_flight = 0
+        self.retried = 0
+        self._waiting = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def allowed_in_flight(self):
+        if self.remaining is None or not self.limit:
+            return self.max_in_flight
+        share = self.remaining / self.limit
+        if share >= 0.5:
+            return self.max_in_flight
+        return max(1, min(self.max_in_flight, int(self.max_in_flight * share * 2), self.remaining))
+
+    def get(self, session, url, priority=PRIORITY_DETAIL, **kwargs):
+        return self.request(session, "GET", url, priority, **kwargs)
+
+    def request(self, session, method, url, priority=PRIORITY_DETAIL, **kwargs):
+        """`session.request(method, url, **kwargs)` under the token's budget, retried on limits and server errors."""
+        for attempt in range(self.retries + 1):
+            wait = self._acquire(priority)
+            if wait is not None:
+                return rate_limited_response(url, wait)
+            response = None
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                observe_outbound_error(url, e)
+                if attempt == self.retries:
+                    raise
+            finally:
+                self._release(response)
+
+            delay = self._backoff(attempt) if response is None else self._retry_delay(response, attempt)
+            if delay is None or attempt == self.retries:
+                return response
+            with self._cond:
+                self.retried += 1
+            time.sleep(delay)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "remaining": self.remaining,
+                "limit": self.limit,
+                "reset_at": self.reset_at,
+                "in_flight": self.in_flight,
+                "allowed_in_flight": self.allowed_in_flight(),
+                "queued": len(self._waiting),
+                "retried": self.retried
+            }
+
+    def _acquire(self, priority):
+        """Take an in-flight slot; returns None, or the pause left when it is longer than `backoff_max`."""
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            while True:
+                wait = self._pause_remaining()
+                if wait > self.backoff_max:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                    return wait
+                if wait <= 0 and self._waiting[0] == ticket and self.in_flight < self.allowed_in_flight():
+                    heapq.heappop(self._waiting)
+                    self.in_flight += 1
+                    if self.remaining:
+                        self.remaining -= 1  # optimistic, corrected by the response headers
+                    self._cond.notify_all()
+                    return None
+                self._cond.wait(timeout=wait if wait > 0 else None)
+
+    def _release(self, response):
+        with self._cond:
+            self.in_flight -= 1
+            if response is not None and "X-RateLimit-Remaining" in response.headers:
+                self.remaining = int(response.headers["X-RateLimit-Remaining"])
+                self.limit = int(response.headers.get("X-RateLimit-Limit", 0)) or self.limit
+                self.reset_at = float(response.headers.get("X-RateLimit-Reset", 0))
+            self._cond.notify_all()
+
+    def _pause_remaining(self):
+        now = time.time()
+        until = self.paused_until
+        if self.remaining == 0 and self.reset_at > now:
+            until = max(until, self.reset_at)
+        return until - now
+
+    def _backoff(self, attempt):
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _retry_delay(self, response, attempt):
+        """Seconds to wait before retrying `response`, or None to hand it back to the caller."""
+        if response.status_code not in RETRY_STATUSES:
+            return None
+        if response.status_code in (403, 429):
+            if response.headers.get("Retry-After"):
+                delay = float(response.headers["Retry-After"])
+            elif response.headers.get("X-RateLimit-Remaining") == "0":
+                delay = float(response.headers.get("X-RateLimit-Reset", 0)) - time.time() + 1
+            elif response.status_code == 403:
+                return None  # a plain permission error, not a limit
+            else:
+                delay = self._backoff(attempt)
+            if delay > self.backoff_max:
+                return None
+            delay = max(delay, 0)
+            # Secondary limits apply to the whole token, so hold every request back
+            with self._cond:
+                self.paused_until = max(self.paused_until, time.time() + delay)
+            return delay
+        return self._backoff(attempt)
+
+
+def rate_limited_response(url, wait):
+    """429 answered without a request, for a token whose budget only resets in `wait` seconds."""
+    response = requests.Response()
+    response.status_code = 429
+    response.url = url
+    response.headers["Retry-After"] = str(math.ceil(wait))
+    response._content = b""
+    return response
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(token, max_in_flight):
+    """Scheduler shared by every request made with `token`."""
+    with _schedulers_lock:
+        if token not in _schedulers:
+            _schedulers[token] = RateLimitScheduler(max_in_flight)
+        return _schedulers[token]
+
+
+def drop_scheduler(token):
+    """Forget the budget tracked for `token`, once nothing is requesting with it."""
+    with _schedulers_lock:
+        _schedulers.pop(token, None)
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import threading
+import zlib
+
+from .storage import INSTANCE_DIR, SizedCache
+from .model_api import elaboration_version
+from .collocations import patterns_version
+from .nlp_models import spacy_version
+from .text_analysis import style_version
+from .commit_classifier import classifier_version
+from .summarizer import summary_version
+
+REPORT_CACHE_PATH = os.getenv("REPORT_CACHE_PATH", os.path.join(INSTANCE_DIR, "reports.sqlite3"))
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))  # compressed
+
+REPORT_VERSION = 2  # bump when build_report assembles its result differently
+
+
+def report_version():
+    """
+    Hash of what every report stage depends on besides the commits.
+
+    Each stage module reports its own version: code version constants,
+    settings that change its output, and the models it loads. Any change
+    gives new cache keys, and the previous version's entries are dropped.
+    """
+    versions = {
+        "report": REPORT_VERSION,
+        "elaboration": elaboration_version(),
+        "patterns": patterns_version(),
+        "parsing": spacy_version(),
+        "analysis": style_version(),
+        "classification": classifier_version(),
+        "summary": summary_version(),
+    }
+    return hashlib.sha256(json.dumps(versions, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+class ReportCache(SizedCache):
+    """
+    SQLite store of finished reports, keyed by their commits and the pipeline version.
+
+    Reports are kept as compressed JSON. Least recently used entries go
+    first once the stored reports exceed `max_bytes`.
+    """
+    table = "reports"
+    evict_batch = 16
+
+    def __init__(self, path, version, max_bytes=REPORT_CACHE_MAX_BYTES):
+        super().__init__(path, max_bytes,
+                         "key TEXT PRIMARY KEY, version TEXT, report BLOB, size INTEGER, accessed_at REAL")
+        self.version = version
+        # Reports built by an older pipeline can never be hit again
+        self._delete_where("version != ?", (version,))
+        self._conn.commit()
+
+    def key(self, commits):
+        """Canonical hash of a commits payload under this pipeline version; also the report's ETag."""
+        payload = json.dumps(commits, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(f"{self.version}\n{payload}".encode()).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT report FROM reports WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+            self._touch([key])
+            self._conn.commit()
+            self.counters["hits"] += 1
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key, report):
+        data = zlib.compress(json.dumps(report).encode())
+        with self._lock:
+            self._store(key, len(data), version=self.version, report=data)
+            self._conn.commit()
+
+    def stats(self):
+        return dict(super().stats(), version=self.version)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_report_cache():
+    """Process-wide report cache, or None when REPORT_CACHE_PATH is set to an empty string."""
+    global _cache
+    if not REPORT_CACHE_PATH:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ReportCache(REPORT_CACHE_PATH, report_version())
+    return _cache
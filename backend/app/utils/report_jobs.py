@@ -0,0 +1,194 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .storage import INSTANCE_DIR, connect
+
+REPORT_JOB_PATH = os.getenv("REPORT_JOB_PATH", os.path.join(INSTANCE_DIR, "report_jobs.sqlite3"))
+REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", "2"))
+REPORT_JOB_TTL = int(os.getenv("REPORT_JOB_TTL", "3600"))  # seconds a finished job and its result are kept
+REPORT_JOB_HEARTBEAT = int(os.getenv("REPORT_JOB_HEARTBEAT", "10"))  # seconds between liveness marks of live jobs
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+logger = logging.getLogger(__name__)
+
+
+class JobStore:
+    """
+    SQLite record of report jobs: status, result or error, and progress events.
+
+    Every gunicorn worker opens the same file, so a job can be polled from
+    any worker whichever one runs it. Jobs finished more than `ttl` seconds
+    ago are deleted together with their events.
+
+    The worker running a job marks it alive with `heartbeat`. A queued or
+    running job whose last mark is older than `stale_after` seconds lost its
+    worker, and is failed when read or when the next job is created.
+    """
+
+    def __init__(self, path, ttl=REPORT_JOB_TTL, stale_after=REPORT_JOB_HEARTBEAT * 3):
+        self.ttl = ttl
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY, status TEXT, result TEXT, error TEXT, created_at REAL, finished_at REAL,"
+            " started_at REAL, heartbeat_at REAL)"
+        )
+        # Files written before jobs had heartbeats
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column in ("started_at", "heartbeat_at"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} REAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_events ("
+            " job_id TEXT, seq INTEGER, event TEXT, data TEXT, PRIMARY KEY (job_id, seq))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at)")
+
+    def create(self):
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._purge_expired()
+            self._fail_stale()
+            now = time.time()
+            self._conn.execute("INSERT INTO jobs (id, status, created_at, heartbeat_at) VALUES (?, ?, ?, ?)",
+                               (job_id, QUEUED, now, now))
+            self._conn.commit()
+        return job_id
+
+    def set_status(self, job_id, status, result=None, error=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, started_at = COALESCE(?, started_at),"
+                " finished_at = ?, heartbeat_at = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error,
+                 now if status == RUNNING else None, now if status in (DONE, FAILED) else None, now, job_id)
+            )
+            self._conn.commit()
+
+    def heartbeat(self, job_ids):
+        """Mark jobs as still having a live worker."""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany("UPDATE jobs SET heartbeat_at = ? WHERE id = ?",
+                                   [(now, job_id) for job_id in job_ids])
+            self._conn.commit()
+
+    def add_event(self, job_id, event, data):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO job_events SELECT ?, COALESCE(MAX(seq), 0) + 1, ?, ? FROM job_events WHERE job_id = ?",
+                (job_id, event, json.dumps(data), job_id)
+            )
+            self._conn.commit()
+
+    def get(self, job_id):
+        """{"id", "status", "result", "error", "started_at"} or None for unknown or expired jobs."""
+        with self._lock:
+            self._fail_stale(job_id)
+            row = self._conn.execute(
+                "SELECT status, result, error, started_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, result, error, started_at = row
+        return {"id": job_id, "status": status, "result": json.loads(result) if result else None, "error": error,
+                "started_at": started_at}
+
+    def events(self, job_id, after=0):
+        """Progress events with a sequence number above `after`, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, event, data FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after)
+            ).fetchall()
+        return [{"seq": seq, "event": event, "data": json.loads(data)} for seq, event, data in rows]
+
+    def _fail_stale(self, job_id=None):
+        now = time.time()
+        query = ("UPDATE jobs SET status = ?, error = ?, finished_at = ?"
+                 " WHERE status IN (?, ?) AND COALESCE(heartbeat_at, created_at) < ?")
+        params = [FAILED, "The worker running this job stopped", now, QUEUED, RUNNING, now - self.stale_after]
+        if job_id is not None:
+            query += " AND id = ?"
+            params.append(job_id)
+        if self._conn.execute(query, params).rowcount:
+            self._conn.commit()
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.ttl
+        expired = [row[0] for row in self._conn.execute("SELECT id FROM jobs WHERE finished_at < ?", (cutoff,))]
+        for job_id in expired:
+            self._conn.execute("DELETE FROM job_events WHERE job_id = ?", (job_id,))
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+
+class JobQueue:
+    """
+    Runs report jobs on a pool of background threads, recording them in a JobStore.
+
+    `submit(fn, *args)` returns a job id straight away; the job later calls
+    `fn(*args, progress=...)`, where `progress(event, **data)` appends a
+    progress event, and stores what it returns as the job result. Queued and
+    running jobs get a heartbeat every `heartbeat` seconds while this
+    process lives.
+    """
+
+    def __init__(self, store, workers=REPORT_JOB_WORKERS, heartbeat=REPORT_JOB_HEARTBEAT):
+        self.store = store
+        self.heartbeat = heartbeat
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report-job")
+        self._live = set()
+        self._live_lock = threading.Lock()
+        threading.Thread(target=self._beat, name="report-job-heartbeat", daemon=True).start()
+
+    def submit(self, fn, *args):
+        job_id = self.store.create()
+        with self._live_lock:
+            self._live.add(job_id)
+        self._pool.submit(self._run, job_id, fn, args)
+        return job_id
+
+    def _beat(self):
+        while True:
+            time.sleep(self.heartbeat)
+            with self._live_lock:
+                live = list(self._live)
+            if live:
+                try:
+                    self.store.heartbeat(live)
+                except Exception:
+                    logger.exception("Could not mark report jobs alive")
+
+    def _run(self, job_id, fn, args):
+        self.store.set_status(job_id, RUNNING)
+        try:
+            result = fn(*args, progress=lambda event, **data: self.store.add_event(job_id, event, data))
+        except Exception as e:
+            logger.exception("Report job %s failed", job_id)
+            self.store.set_status(job_id, FAILED, error=str(e))
+        else:
+            self.store.set_status(job_id, DONE, result=result)
+        finally:
+            with self._live_lock:
+                self._live.discard(job_id)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(JobStore(REPORT_JOB_PATH or ":memory:"))
+    return _queue
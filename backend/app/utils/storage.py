@@ -0,0 +1,127 @@
+import os
+import sqlite3
+import threading
+import time
+
+INSTANCE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "instance"))
+
+
+def connect(path):
+    """SQLite connection usable from any thread, in WAL mode so every worker process can share the file."""
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def hit_ratio(hits, lookups):
+    return round(hits / lookups, 4) if lookups else 0.0
+
+
+class SizedCache:
+    """
+    SQLite table of cached values bounded by their total size.
+
+    Subclasses give the table's `columns`, which must include `key TEXT
+    PRIMARY KEY`, `size INTEGER` and `accessed_at REAL`, and store rows with
+    `_store` while holding `_lock`. Least recently used rows go first once
+    the sizes exceed `max_bytes`, `evict_batch` rows per query.
+
+    The total size lives in a one-row `<table>_size` table kept up to date by
+    triggers, and writes take the database lock before reading it, so the
+    budget holds across every process sharing the file.
+    """
+    table = None
+    evict_batch = 256
+    # Counters that count as hits and as misses in `hit_ratio`
+    hit_outcomes = ("hits",)
+    miss_outcomes = ("misses",)
+
+    def __init__(self, path, max_bytes, columns):
+        self.max_bytes = max_bytes
+        self.counters = dict.fromkeys(self.hit_outcomes + self.miss_outcomes + ("evictions",), 0)
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        table = self.table
+        self._begin()
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns})")
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed_at)")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table}_size (id INTEGER PRIMARY KEY CHECK (id = 0), total INTEGER)"
+        )
+        self._conn.execute(f"INSERT OR IGNORE INTO {table}_size SELECT 0, COALESCE(SUM(size), 0) FROM {table}")
+        self._conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_size_insert AFTER INSERT ON {table}"
+            f" BEGIN UPDATE {table}_size SET total = total + NEW.size; END"
+        )
+        self._conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_size_delete AFTER DELETE ON {table}"
+            f" BEGIN UPDATE {table}_size SET total = total - OLD.size; END"
+        )
+        self._conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_size_update AFTER UPDATE OF size ON {table}"
+            f" BEGIN UPDATE {table}_size SET total = total + NEW.size - OLD.size; END"
+        )
+        self._conn.commit()
+
+    def count(self, outcome, amount=1):
+        with self._lock:
+            self.counters[outcome] += amount
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+            stats = dict(self.counters, entries=entries, bytes=self._size())
+        hits = sum(stats[outcome] for outcome in self.hit_outcomes)
+        stats["hit_ratio"] = hit_ratio(hits, hits + sum(stats[outcome] for outcome in self.miss_outcomes))
+        return stats
+
+    def _begin(self):
+        """Take the database write lock for the rest of the transaction, so sizes read next are current."""
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN IMMEDIATE")
+
+    def _size(self):
+        return self._conn.execute(f"SELECT total FROM {self.table}_size").fetchone()[0]
+
+    def _store(self, key, size, **values):
+        """Insert or replace the row for `key`, evicting if over budget. The caller holds `_lock` and commits."""
+        self._begin()
+        self._delete(key)
+        columns = ["key", *values, "size", "accessed_at"]
+        self._conn.execute(
+            f"INSERT INTO {self.table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            (key, *values.values(), size, time.time())
+        )
+        if self._size() > self.max_bytes:
+            self._evict()
+
+    def _touch(self, keys, now=None):
+        now = time.time() if now is None else now
+        self._conn.executemany(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", [(now, key) for key in keys])
+
+    def _delete(self, key):
+        self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def _delete_where(self, condition, params=()):
+        """Delete the rows matching an SQL condition; returns how many went."""
+        return self._conn.execute(f"DELETE FROM {self.table} WHERE {condition}", params).rowcount
+
+    def _evict(self):
+        # Drop least recently used rows until we are back under 90% of the budget
+        self._begin()
+        target = self.max_bytes * 0.9
+        size = self._size()
+        while size > target:
+            rows = self._conn.execute(
+                f"SELECT key, size FROM {self.table} ORDER BY accessed_at LIMIT {self.evict_batch}"
+            ).fetchall()
+            if not rows:
+                break
+            for key, row_size in rows:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                size -= row_size
+                self.counters["evictions"] += 1
+                if size <= target:
+                    break
@@ -0,0 +1,78 @@
+import os
+
+from .doc_store import DOC_BATCH_SIZE, DOC_PROCESSES, pipes_to_disable
+from .nlp_models import get_nlp
+
+SUMMARY_SENTENCES = int(os.getenv("SUMMARY_SENTENCES", "10"))
+SUMMARY_REPO_SENTENCES = int(os.getenv("SUMMARY_REPO_SENTENCES", "10"))  # kept per repo for the final ranking
+SUMMARY_CHUNK_SIZE = int(os.getenv("SUMMARY_CHUNK_SIZE", "200"))  # most docs ranked by a single TextRank pass
+SUMMARY_VERSION = 1  # bump when the sentence selection changes
+
+
+def summary_version():
+    return [SUMMARY_VERSION, SUMMARY_SENTENCES, SUMMARY_REPO_SENTENCES, SUMMARY_CHUNK_SIZE]
+
+
+def textrank_sentences(nlp, docs, limit):
+    """The `limit` top TextRank sentences of `docs` taken as one text, each as its own Doc."""
+    from spacy.tokens import Doc
+
+    if not docs:
+        return []
+    doc = nlp.get_pipe("textrank")(Doc.from_docs(docs))
+    return [sent.as_doc() for sent in doc._.textrank.summary(limit_phrases=10, limit_sentences=limit)]
+
+
+class TextRankReducer:
+    """
+    Running extractive summary of a stream of Docs.
+
+    Once `chunk_size` Docs are pending they are replaced by their `limit`
+    best sentences, so at most `chunk_size + limit` Docs are held whatever
+    the length of the stream.
+    """
+
+    def __init__(self, nlp, limit, chunk_size=SUMMARY_CHUNK_SIZE):
+        self.nlp = nlp
+        self.limit = limit
+        self.chunk_size = chunk_size
+        self._pending = []
+
+    def add(self, doc):
+        self._pending.append(doc)
+        if len(self._pending) >= self.chunk_size:
+            self._pending = textrank_sentences(self.nlp, self._pending, self.limit)
+
+    def result(self):
+        return textrank_sentences(self.nlp, self._pending, self.limit)
+
+
+def summarize(entries, docs=None, nlp=None, limit=SUMMARY_SENTENCES, repo_limit=SUMMARY_REPO_SENTENCES,
+              chunk_size=SUMMARY_CHUNK_SIZE, batch_size=DOC_BATCH_SIZE, n_process=DOC_PROCESSES):
+    """
+    Top sentences of an iterable of (repo, text) pairs, e.g. a report's elaborations.
+
+    TextRank runs hierarchically: over each repo's texts, in chunks of at most
+    `chunk_size` Docs, then over the repos' best sentences. Texts come from the
+    `docs` DocStore when given, otherwise they are streamed through `nlp.pipe`
+    on `n_process` processes without NER, so memory stays bounded by the
+    chunk size rather than the report.
+    """
+    nlp = nlp if nlp is not None else (docs.nlp if docs is not None else get_nlp())
+    if docs is not None:
+        parsed = ((docs[text], repo) for repo, text in entries)
+    else:
+        parsed = nlp.pipe(((text, repo) for repo, text in entries), as_tuples=True, batch_size=batch_size,
+                          n_process=n_process, disable=pipes_to_disable(nlp))
+
+    repos = {}
+    for doc, repo in parsed:
+        if repo not in repos:
+            repos[repo] = TextRankReducer(nlp, repo_limit, chunk_size)
+        repos[repo].add(doc)
+
+    overall = TextRankReducer(nlp, limit, chunk_size)
+    for reducer in repos.values():
+        for sentence in reducer.result():
+            overall.add(sentence)
+    return [sentence.text.strip() for sentence in overall.result()]
@@ -0,0 +1,153 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+T5_MODEL_NAME = os.getenv("T5_MODEL_NAME", "t5-small")
+T5_BATCH_SIZE = int(os.getenv("T5_BATCH_SIZE", "16"))
+T5_NUM_BEAMS = int(os.getenv("T5_NUM_BEAMS", "4"))  # 1 is greedy decoding
+T5_QUANTIZE = os.getenv("T5_QUANTIZE", "0") == "1"  # dynamic int8 quantization of the Linear layers
+T5_IN_PROCESS = os.getenv("T5_IN_PROCESS", "0") == "1"  # skip the worker process, e.g. for debugging
+T5_MAX_INPUT_LENGTH = 64
+T5_MAX_OUTPUT_LENGTH = 128
+
+T5_PROMPT_TEMPLATE = "Explain the work done in code based on the following commit message: {message}"
+
+
+def load_model(model_name=T5_MODEL_NAME, quantize=T5_QUANTIZE):
+    """(tokenizer, model) ready for CPU inference."""
+    import torch
+    from transformers import T5Tokenizer, T5ForConditionalGeneration
+
+    tokenizer = T5Tokenizer.from_pretrained(model_name)
+    model = T5ForConditionalGeneration.from_pretrained(model_name).eval()
+    if quantize:
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return tokenizer, model
+
+
+def generate_batched(tokenizer, model, messages, batch_size=T5_BATCH_SIZE, num_beams=T5_NUM_BEAMS):
+    """
+    Elaborations for `messages`, in order.
+
+    Prompts are sorted by length so each padded batch wastes little work on
+    padding, generated `batch_size` at a time under `torch.inference_mode()`,
+    then put back in the original order.
+    """
+    import torch
+
+    prompts = [T5_PROMPT_TEMPLATE.format(message=message) for message in messages]
+    order = sorted(range(len(prompts)), key=lambda i: len(prompts[i]))
+    elaborations = [None] * len(prompts)
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            inputs = tokenizer([prompts[i] for i in indices], return_tensors="pt", padding=True, truncation=True,
+                               max_length=T5_MAX_INPUT_LENGTH)
+            output_ids = model.generate(**inputs, max_length=T5_MAX_OUTPUT_LENGTH, num_beams=num_beams,
+                                        early_stopping=num_beams > 1)
+            for i, text in zip(indices, tokenizer.batch_decode(output_ids, skip_special_tokens=True)):
+                elaborations[i] = text
+    return elaborations
+
+
+# State of the worker process
+_worker_model = None
+
+
+def _init_worker(model_name, quantize):
+    global _worker_model
+    import torch
+    torch.set_num_threads(os.cpu_count() or 1)
+    _worker_model = load_model(model_name, quantize)
+
+
+def _worker_generate(messages, batch_size, num_beams):
+    tokenizer, model = _worker_model
+    return generate_batched(tokenizer, model, messages, batch_size, num_beams)
+
+
+def _worker_ready():
+    return _worker_model is not None
+
+
+class T5Worker:
+    """
+    T5 elaboration served from a dedicated process.
+
+    The model is loaded once in a spawned worker process, so generation does
+    not hold the GIL of the Flask request threads; callers just block on the
+    result. With `in_process` the model runs in the calling process instead.
+    """
+
+    def __init__(self, model_name=T5_MODEL_NAME, batch_size=T5_BATCH_SIZE, num_beams=T5_NUM_BEAMS,
+                 quantize=T5_QUANTIZE, in_process=T5_IN_PROCESS):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.num_beams = num_beams
+        self.quantize = quantize
+        self.in_process = in_process
+        self._model = None
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def model_id(self):
+        """Identifies the generation settings, for cache keys."""
+        return f"{self.model_name}/beams={self.num_beams}" + ("/int8" if self.quantize else "")
+
+    def elaborate(self, messages):
+        if not messages:
+            return []
+        if self.in_process:
+            with self._lock:
+                if self._model is None:
+                    self._model = load_model(self.model_name, self.quantize)
+                return generate_batched(*self._model, messages, self.batch_size, self.num_beams)
+        try:
+            return self._executor().submit(_worker_generate, messages, self.batch_size, self.num_beams).result()
+        except BrokenProcessPool:
+            # The worker died (e.g. killed for memory); start a fresh one and retry once
+            with self._lock:
+                self._pool = None
+            return self._executor().submit(_worker_generate, messages, self.batch_size, self.num_beams).result()
+
+    def warm_up(self):
+        """Load the model now, in the worker process unless running in-process."""
+        if self.in_process:
+            with self._lock:
+                if self._model is None:
+                    self._model = load_model(self.model_name, self.quantize)
+            return
+        # The pool runs the initializer, which loads the model, before its first task
+        self._executor().submit(_worker_ready).result()
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.model_name, self.quantize)
+                )
+            return self._pool
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_t5_worker():
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = T5Worker()
+    return _worker
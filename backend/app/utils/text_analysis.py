@@ -1,55 +1,316 @@
-from collections import defaultdict
-import nltk
-from textblob import TextBlob
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 
+from .metrics import model_load
+from .nlp_models import ensure_nltk_data
 
-def analyze_commit_text(text):
-    tokens = nltk.word_tokenize(text)
-    tags = nltk.pos_tag(tokens)
+STYLE_WORKERS = int(os.getenv("STYLE_WORKERS", str(min(4, os.cpu_count() or 1))))
+STYLE_SHARD_SIZE = int(os.getenv("STYLE_SHARD_SIZE", "2000"))  # texts per worker task; smaller inputs stay in-process
+
+STYLE_METRICS = ('length', 'noun_ratio', 'verb_ratio', 'polarity', 'subjectivity', 'type_token_ratio')
+
+STYLE_VERSION = 2  # bump when a style metric or the profile summary changes
+
+# Words that flip and damp the polarity of the next word, as in TextBlob's pattern analyzer
+NEGATIONS = {"no", "not", "n't", "never"}
+EXCLAMATION_BOOST = 1.25
+
+_lexicon = None
+_lexicon_lock = threading.Lock()
+
+
+def style_version():
+    from importlib.metadata import version
+
+    return [STYLE_VERSION, version("textblob")]
+
+
+def get_sentiment_lexicon():
+    """
+    TextBlob's sentiment lexicon as ({word: id}, polarity, subjectivity,
+    intensity, modifier), the last four arrays indexed by word id.
+
+    Scores are averaged over every sense and part of speech of a word, the
+    way TextBlob scores a word it has no tag for. `modifier` marks words with
+    an adverb sense, which intensify the next word.
+    """
+    global _lexicon
+    with _lexicon_lock:
+        if _lexicon is None:
+            with model_load("sentiment_lexicon"):
+                from textblob.en import sentiment
+
+                words, scores, modifier = {}, [], []
+                for word, senses in sentiment.items():
+                    if None in senses and " " not in word:
+                        words[word] = len(words)
+                        scores.append(senses[None][:3])
+                        modifier.append("RB" in senses)
+                polarity, subjectivity, intensity = np.array(scores, dtype=float).T
+                _lexicon = words, polarity, subjectivity, intensity, np.array(modifier, dtype=bool)
+    return _lexicon
 
-    noun_count = sum(1 for word, tag in tags if tag.startswith('NN'))
-    verb_count = sum(1 for word, tag in tags if tag.startswith('VB'))
 
-    blob = TextBlob(text)
-    polarity = blob.sentiment.polarity
-    subjectivity = blob.sentiment.subjectivity
+def extract_features(texts):
+    """
+    Style metrics for each of `texts`, as {metric: array} with one entry per text.
 
-    unique_tokens = len(set(tokens))
-    total_tokens = len(tokens)
-    type_token_ratio = unique_tokens / total_tokens if total_tokens else 0
+    Texts are tokenized and POS-tagged with NLTK as one batch.
+    """
+    import nltk
+
+    ensure_nltk_data()
+    token_lists = [nltk.word_tokenize(text) for text in texts]
+    tag_lists = [[tag for _, tag in tags] for tags in nltk.pos_tag_sents(token_lists)]
+    return features_from_tokens(token_lists, tag_lists)
+
+
+def features_from_tokens(token_lists, tag_lists):
+    """
+    Style metrics for already tokenized texts, given Penn Treebank tags for each token.
+
+    Sentiment is scored as TextBlob's pattern analyzer scores a string; see
+    `_sentiment`.
+    """
+    count = len(token_lists)
+    lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=count)
+    # Index of the text each token belongs to, to aggregate token arrays per text
+    owner = np.repeat(np.arange(count), lengths)
+    tags = [tag for tags in tag_lists for tag in tags]
+    nouns = np.bincount(owner, weights=[tag.startswith('NN') for tag in tags], minlength=count)
+    verbs = np.bincount(owner, weights=[tag.startswith('VB') for tag in tags], minlength=count)
+    unique = np.fromiter((len(set(tokens)) for tokens in token_lists), dtype=np.int64, count=count)
+
+    lowered = [token.lower() for tokens in token_lists for token in tokens]
+    polarity, subjectivity, matched = _sentiment(lowered, owner, lengths)
 
     return {
-        'length': total_tokens,
-        'noun_ratio': noun_count / total_tokens if total_tokens else 0,
-        'verb_ratio': verb_count / total_tokens if total_tokens else 0,
-        'polarity': polarity,
-        'subjectivity': subjectivity,
-        'type_token_ratio': type_token_ratio
+        'length': lengths,
+        'noun_ratio': _ratio(nouns, lengths),
+        'verb_ratio': _ratio(verbs, lengths),
+        'polarity': _ratio(polarity, matched),
+        'subjectivity': _ratio(subjectivity, matched),
+        'type_token_ratio': _ratio(unique, lengths),
     }
 
 
-def build_style_profile(json_data):
-    style_profile = defaultdict(list)
+def _sentiment(lowered, owner, lengths):
+    """
+    Per-text polarity sum, subjectivity sum and assessment count of lowercased tokens.
+
+    TextBlob walks each text word by word. A lexicon word is one assessment,
+    unless it follows a modifier (an adverb such as "extremely"): then it
+    replaces the modifier's assessment with its own scores times the
+    modifier's intensity. A negation before a word, kept across one-letter
+    tokens, inverts that word's intensity and halves and flips the
+    assessment's polarity. Modifiers carry across tokens of up to two
+    characters, and "-ly" modifiers across negations too ("really not
+    good"), which then negate the modifier's assessment. Each "!" right
+    after an assessment multiplies its polarity by 1.25. Here every rule is
+    an array mask over the tokens of all texts at once, with "carries across"
+    checked against prefix sums of the tokens that break it. Emoticons,
+    which NLTK and spaCy mostly split anyway, are not scored.
+    """
+    count = len(lengths)
+    words, polarity_table, subjectivity_table, intensity_table, modifier_table = get_sentiment_lexicon()
+    size = len(lowered)
+    # Token properties are looked up once per distinct token, then spread to every token
+    vocabulary = {}
+    token_ids = np.fromiter((vocabulary.setdefault(token, len(vocabulary)) for token in lowered), dtype=np.int64,
+                            count=size)
+
+    def per_token(prop, dtype=bool):
+        return np.fromiter((prop(token) for token in vocabulary), dtype=dtype, count=len(vocabulary))[token_ids]
+
+    ids = per_token(lambda token: words.get(token, -1), np.int64)
+    known = ids >= 0
+    ids = np.where(known, ids, 0)
+    index = np.arange(size)
+    text_start = np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+    def previous(mask):
+        """Index of the last token before each one, in the same text, where `mask` holds; -1 if none."""
+        last = np.maximum.accumulate(np.where(mask, index, -1))
+        result = np.concatenate([[-1], last[:-1]]) if size else last
+        return np.where(result >= text_start, result, -1)
+
+    def between(breaks, start, end):
+        """Number of `breaks` strictly between positions `start` and `end`."""
+        sums = np.concatenate([[0], np.cumsum(breaks)])
+        return sums[end] - sums[np.minimum(start + 1, end)]
+
+    negation = per_token(lambda token: token in NEGATIONS)
+    long_token = per_token(lambda token: len(token) > 2)
+    clears_negation = ~known & ~negation & per_token(lambda token: len(token.strip("'")) > 1)
+    ly = per_token(lambda token: token.endswith("ly"))
+
+    # The modifier in effect at each token: the previous lexicon word, if it is one and nothing broke the chain
+    last_known = previous(known)
+    has_last = last_known >= 0
+    last = np.where(has_last, last_known, 0)
+    breaks_modifier = ~known & long_token
+    broken = np.where(ly[last], between(breaks_modifier & ~negation, last, index),
+                      between(breaks_modifier, last, index)) > 0
+    modified = has_last & modifier_table[ids[last]] & ~broken
+    absorbed = ~known & negation & modified & ly[last]
+
+    # A negation is in effect at a word when the last token to set or clear it was a negation
+    last_event = previous(known | negation | clears_negation)
+    event = np.where(last_event >= 0, last_event, 0)
+    negated = known & (last_event >= 0) & negation[event] & ~absorbed[event]
+
+    intensity = np.where(negated, 1 / intensity_table[ids], intensity_table[ids])
+    continues = known & modified
+    scale = np.where(continues, intensity[last], 1.0)
+    polarity = np.clip(polarity_table[ids] * scale, -1, 1)
+    subjectivity = np.clip(subjectivity_table[ids] * scale, -1, 1)
+
+    # Assessments: runs of lexicon words joined by modifiers, scored by their last word
+    words_at = index[known]
+    starts = ~continues[words_at]
+    assessment = np.full(size, -1)
+    assessment[words_at] = np.cumsum(starts) - 1
+    last_of_run = np.ones(len(words_at), dtype=bool)
+    last_of_run[:-1] = starts[1:]
+    ends = words_at[last_of_run]
+    total = len(ends)
+    is_end = np.zeros(size, dtype=bool)
+    is_end[ends] = True
+
+    exclamation = per_token(lambda token: token == "!")
+    boosted = exclamation & has_last & is_end[last]
+    boosts = np.bincount(assessment[last[boosted]], minlength=total)
+    flipped = np.zeros(total, dtype=bool)
+    flipped[assessment[index[negated]]] = True
+    flipped[assessment[last[absorbed]]] = True
+
+    scores = np.clip(polarity[ends] * EXCLAMATION_BOOST ** boosts, -1, 1)
+    scores = np.where(flipped, scores * -0.5, scores)
+    texts = owner[ends]
+    return (np.bincount(texts, weights=scores, minlength=count),
+            np.bincount(texts, weights=subjectivity[ends], minlength=count),
+            np.bincount(texts, minlength=count))
+
+
+def _ratio(numerator, denominator):
+    """numerator / denominator element-wise, 0 where the denominator is 0."""
+    return np.divide(numerator, denominator, out=np.zeros(len(numerator)), where=denominator > 0)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _executor(workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def batch_extract_features(texts, workers=STYLE_WORKERS, shard_size=STYLE_SHARD_SIZE):
+    """
+    `extract_features` for any number of texts.
+
+    Inputs larger than one shard are split into `shard_size` chunks that run
+    on a process pool of `workers`, then concatenated in the original order.
+    """
+    texts = list(texts)
+    if workers <= 1 or len(texts) <= shard_size:
+        return extract_features(texts)
+    shards = [texts[i:i + shard_size] for i in range(0, len(texts), shard_size)]
+    results = list(_executor(workers).map(extract_features, shards))
+    return {metric: np.concatenate([result[metric] for result in results]) for metric in STYLE_METRICS}
+
+
+def analyze_commit_text(text):
+    features = extract_features([text])
+    return {metric: features[metric][0].item() for metric in STYLE_METRICS}
+
+
+class StyleProfile:
+    """
+    Running style metrics per developer/repo, stored column-wise.
+
+    `groups` names the developers; `counts` and each array in `sums` hold one
+    entry per group, in the same order. Batches of commits are folded in with
+    a vectorized group-by, so a profile is built in one pass over any number
+    of batches, and profiles built on separate shards `merge` into one.
+    """
+
+    def __init__(self):
+        self.groups = []
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.sums = {metric: np.zeros(0) for metric in STYLE_METRICS}
+        self._index = {}
+
+    def add(self, groups, features):
+        """Fold in per-commit `features` ({metric: array}), where `groups[i]` owns commit i."""
+        ids = np.fromiter((self._group_id(group) for group in groups), dtype=np.int64, count=len(groups))
+        self._grow()
+        self.counts += np.bincount(ids, minlength=len(self.groups))
+        for metric in STYLE_METRICS:
+            self.sums[metric] += np.bincount(ids, weights=features[metric], minlength=len(self.groups))
+        return self
+
+    def merge(self, other):
+        """Add the commits of another profile to this one."""
+        ids = np.fromiter((self._group_id(group) for group in other.groups), dtype=np.int64, count=len(other.groups))
+        self._grow()
+        np.add.at(self.counts, ids, other.counts)
+        for metric in STYLE_METRICS:
+            np.add.at(self.sums[metric], ids, other.sums[metric])
+        return self
+
+    def means(self):
+        """{metric: array of per-group means}."""
+        return {metric: self.sums[metric] / np.maximum(self.counts, 1) for metric in STYLE_METRICS}
+
+    def _group_id(self, group):
+        if group not in self._index:
+            self._index[group] = len(self.groups)
+            self.groups.append(group)
+        return self._index[group]
+
+    def _grow(self):
+        missing = len(self.groups) - len(self.counts)
+        if missing:
+            self.counts = np.concatenate([self.counts, np.zeros(missing, dtype=np.int64)])
+            for metric in STYLE_METRICS:
+                self.sums[metric] = np.concatenate([self.sums[metric], np.zeros(missing)])
 
-    for entry in json_data:
-        dev = entry.get("repo")
-        text = entry.get("original", "") + " " + entry.get("elaboration", "")
-        result = analyze_commit_text(text)
 
-        for key, value in result.items():
-            style_profile[dev].append(value)
+def build_style_profile(json_data, profile=None, docs=None):
+    """
+    Fold elaborated commits into `profile` (a new StyleProfile by default), grouped by repo.
 
-    return style_profile
+    With a DocStore holding the originals and elaborations, their spaCy tokens
+    and tags are used instead of tokenizing the texts again.
+    """
+    profile = profile if profile is not None else StyleProfile()
+    if docs is None:
+        texts = [entry.get("original", "") + " " + entry.get("elaboration", "") for entry in json_data]
+        features = batch_extract_features(texts)
+    else:
+        pairs = [(docs[entry.get("original", "")], docs[entry.get("elaboration", "")]) for entry in json_data]
+        features = features_from_tokens([[token.text for doc in pair for token in doc] for pair in pairs],
+                                        [[token.tag_ for doc in pair for token in doc] for pair in pairs])
+    return profile.add([entry.get("repo") for entry in json_data], features)
 
 
 def summarize_profile(dev, metrics):
-    avg_length = np.mean(metrics['length'])
-    noun_ratio = np.mean(metrics['noun_ratio'])
-    verb_ratio = np.mean(metrics['verb_ratio'])
-    polarity = np.mean(metrics['polarity'])
-    subjectivity = np.mean(metrics['subjectivity'])
-    ttr = np.mean(metrics['type_token_ratio'])
+    """Style description from a developer's mean metrics ({metric: mean})."""
+    avg_length = metrics['length']
+    noun_ratio = metrics['noun_ratio']
+    verb_ratio = metrics['verb_ratio']
+    polarity = metrics['polarity']
+    subjectivity = metrics['subjectivity']
+    ttr = metrics['type_token_ratio']
 
     sentiment = "positive" if polarity > 0.1 else "negative" if polarity < -0.1 else "neutral"
 
@@ -0,0 +1,202 @@
+"""
+Wire formats for commit lists and reports.
+
+The compact form sends each (repo, language distribution) pair once in a
+`repos` table and the commits as columns, one array per field, with a
+`repo` column of indexes into the table. `loc_per_language` is not sent:
+it is rebuilt from the distribution and the additions and deletions, except
+for the rows in the sparse `loc_overrides` map where the sender's value
+differs from that estimate. Either form can be encoded as JSON (orjson when
+installed) or MessagePack (when msgpack is installed), and gzip or brotli
+compressed.
+"""
+import gzip
+import json
+import os
+import zlib
+
+from .github_api import estimate_loc_per_language
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+WIRE_COMPRESS_MIN_BYTES = int(os.getenv("WIRE_COMPRESS_MIN_BYTES", "1024"))  # smaller bodies are sent as they are
+WIRE_GZIP_LEVEL = int(os.getenv("WIRE_GZIP_LEVEL", "6"))
+WIRE_BROTLI_QUALITY = int(os.getenv("WIRE_BROTLI_QUALITY", "5"))
+WIRE_MAX_BODY_BYTES = int(os.getenv("WIRE_MAX_BODY_BYTES", str(256 * 1024 * 1024)))  # decompressed request bodies
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+
+COMPACT_FORMAT = "compact"
+COMPACT_VERSION = 1
+
+COMMIT_COLUMNS = ("message", "date", "additions", "deletions")
+REPORT_COLUMNS = ("original", "elaboration", "date", "additions", "deletions", "category")
+TEXT_COLUMNS = ("message", "original")  # commit messages, which must be strings
+
+
+def dumps(data):
+    """Compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _columns(entries, names):
+    repos, repo_index = [], {}
+    columns = {name: [] for name in names}
+    columns["repo"] = []
+    overrides = {}
+    for row, entry in enumerate(entries):
+        languages = entry.get("language_distribution") or {}
+        key = (entry.get("repo"), tuple(languages.items()))
+        if key not in repo_index:
+            repo_index[key] = len(repos)
+            repos.append({"name": entry.get("repo"), "languages": languages})
+        columns["repo"].append(repo_index[key])
+        for name in names:
+            columns[name].append(entry.get(name))
+        loc = entry.get("loc_per_language")
+        if loc != _estimate(languages, entry.get("additions"), entry.get("deletions")):
+            overrides[str(row)] = loc
+    return {"format": COMPACT_FORMAT, "version": COMPACT_VERSION, "repos": repos, "columns": columns,
+            "loc_overrides": overrides}
+
+
+def _rows(payload, names):
+    """Entries of a compact block, in order. Raises ValueError for anything malformed."""
+    try:
+        return list(_iter_rows(payload, names))
+    except (KeyError, IndexError, TypeError, AttributeError) as e:
+        raise ValueError(f"Malformed {COMPACT_FORMAT} payload: {e!r}")
+
+
+def _iter_rows(payload, names):
+    if payload.get("format") != COMPACT_FORMAT or payload.get("version") != COMPACT_VERSION:
+        raise ValueError(f"Expected {COMPACT_FORMAT} format version {COMPACT_VERSION}")
+    repos, columns = payload["repos"], payload["columns"]
+    overrides = payload.get("loc_overrides") or {}
+    count = len(columns["repo"])
+    if any(len(columns[name]) != count for name in names):
+        raise ValueError("Compact columns differ in length")
+
+    if not isinstance(repos, list):
+        raise ValueError("Compact repos must be a list")
+
+    for row, values in enumerate(zip(columns["repo"], *(columns[name] for name in names))):
+        index = values[0]
+        # bools are ints, and negative indexes would wrap around
+        if not isinstance(index, int) or isinstance(index, bool) or not 0 <= index < len(repos):
+            raise ValueError(f"Row {row} has an invalid repo index {index!r}")
+        repo = repos[index]
+        entry = dict(zip(names, values[1:]))
+        for name in TEXT_COLUMNS:
+            if name in entry and not isinstance(entry[name], str):
+                raise ValueError(f"Row {row} has a {name} that is not a string")
+        entry["repo"] = repo["name"]
+        entry["language_distribution"] = repo["languages"]
+        entry["loc_per_language"] = overrides[str(row)] if str(row) in overrides else \
+            _estimate(repo["languages"], entry.get("additions"), entry.get("deletions"))
+        yield entry
+
+
+def _estimate(languages, additions, deletions):
+    if not isinstance(additions, (int, float)) or not isinstance(deletions, (int, float)):
+        return None
+    return estimate_loc_per_language(languages, additions, deletions)
+
+
+def compact_commits(commits):
+    """Compact form of commits as built by `github_api.build_commit`."""
+    return _columns(commits, COMMIT_COLUMNS)
+
+
+def expand_commits(payload):
+    """Commit dicts back from `compact_commits` output, in order."""
+    fields = ("message", "repo", "date", "additions", "deletions", "language_distribution", "loc_per_language")
+    return [{field: entry[field] for field in fields} for entry in _rows(payload, COMMIT_COLUMNS)]
+
+
+def compact_report(report):
+    """A /report/generate result with its elaborated commits in compact form."""
+    compact = {key: value for key, value in report.items() if key != "elaborated_commits"}
+    compact["elaborated_commits"] = _columns(report.get("elaborated_commits") or [], REPORT_COLUMNS)
+    return compact
+
+
+def expand_report(report):
+    """Inverse of `compact_report`; reports already in the full form are returned as they are."""
+    elaborated = report.get("elaborated_commits")
+    if not isinstance(elaborated, dict):
+        return report
+    fields = ("original", "elaboration", "repo", "date", "additions", "deletions", "language_distribution",
+              "loc_per_language", "category")
+    return dict(report, elaborated_commits=[{field: entry[field] for field in fields}
+                                            for entry in _rows(elaborated, REPORT_COLUMNS)])
+
+
+def negotiate(accept_mimetypes, accept_encodings):
+    """(mimetype, content encoding or None) to answer with, from a request's Accept and Accept-Encoding."""
+    offered = [JSON_MIMETYPE] + ([MSGPACK_MIMETYPE] if msgpack is not None else [])
+    mimetype = accept_mimetypes.best_match(offered) or JSON_MIMETYPE
+    encoding = None
+    if brotli is not None and accept_encodings["br"]:
+        encoding = "br"
+    elif accept_encodings["gzip"]:
+        encoding = "gzip"
+    return mimetype, encoding
+
+
+def encode_body(data, mimetype=JSON_MIMETYPE, encoding=None):
+    """(body, content encoding actually applied); bodies under WIRE_COMPRESS_MIN_BYTES stay uncompressed."""
+    body = msgpack.packb(data) if mimetype == MSGPACK_MIMETYPE else dumps(data)
+    if encoding is None or len(body) < WIRE_COMPRESS_MIN_BYTES:
+        return body, None
+    if encoding == "br":
+        return brotli.compress(body, quality=WIRE_BROTLI_QUALITY), "br"
+    return gzip.compress(body, WIRE_GZIP_LEVEL), "gzip"
+
+
+def decode_body(body, mimetype=JSON_MIMETYPE, encoding=None):
+    """
+    Decode a request body. Only gzip is accepted as a request encoding,
+    decompressed up to WIRE_MAX_BODY_BYTES. Raises ValueError when the body
+    cannot be decoded.
+    """
+    if encoding == "gzip":
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = decompressor.decompress(body, WIRE_MAX_BODY_BYTES + 1)
+        except zlib.error as e:
+            raise ValueError(f"Invalid gzip body: {e}")
+        if len(body) > WIRE_MAX_BODY_BYTES:
+            raise ValueError("Request body too large")
+    elif encoding not in (None, "", "identity"):
+        raise ValueError(f"Unsupported Content-Encoding: {encoding}")
+
+    if mimetype == MSGPACK_MIMETYPE:
+        if msgpack is None:
+            raise ValueError("MessagePack is not available")
+        try:
+            return msgpack.unpackb(body, strict_map_key=False)
+        except Exception as e:
+            raise ValueError(f"Invalid MessagePack body: {e}")
+    try:
+        return loads(body)
+    except ValueError as e:
+        raise ValueError(f"Invalid JSON body: {e}")
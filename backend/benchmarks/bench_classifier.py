@@ -0,0 +1,48 @@
+"""
+Batch classification throughput (commits/sec) of the persisted hashing +
+linear classifier, against the original per-request TF-IDF + KMeans fit.
+
+    cd backend && python -m benchmarks.bench_classifier
+"""
+import random
+import time
+
+from app.utils.commit_classifier import CommitClassifier, SEED_EXAMPLES
+
+BATCH_SIZES = (10, 100, 1_000, 10_000)
+
+
+def synthetic_elaborations(count, seed=0):
+    rng = random.Random(seed)
+    examples = [text for texts in SEED_EXAMPLES.values() for text in texts]
+    return [f"{rng.choice(examples)} It touches module {rng.randrange(500)}." for _ in range(count)]
+
+
+def kmeans_fit_predict(texts):
+    from sklearn.cluster import KMeans
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    X = TfidfVectorizer(stop_words='english').fit_transform(texts)
+    return KMeans(n_clusters=4, random_state=42).fit_predict(X)
+
+
+def main():
+    classifier = CommitClassifier.from_seed()
+    classifier.predict(synthetic_elaborations(10))  # warm-up
+    for size in BATCH_SIZES:
+        texts = synthetic_elaborations(size)
+
+        start = time.perf_counter()
+        classifier.predict(texts)
+        elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        kmeans_fit_predict(texts)
+        baseline = time.perf_counter() - start
+
+        print(f"{size:>6} commits  predict {size / elapsed:10.0f} commits/s"
+              f"  tfidf+kmeans {size / baseline:9.0f} commits/s  ({baseline / elapsed:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
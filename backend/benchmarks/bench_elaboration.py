@@ -0,0 +1,50 @@
+"""
+Wall-clock of commit elaboration against a local mock LLM endpoint, for
+sequential, concurrent and batched configurations, then for a repeated
+report served from the elaboration cache.
+
+    cd backend && python -m benchmarks.bench_elaboration
+"""
+import os
+import tempfile
+import time
+
+from app.utils import elaboration_cache, model_api
+from benchmarks.llm_stub import StubLLM
+
+MESSAGES = [f"fix bug {i} in parser" for i in range(100)]
+
+
+def main():
+    with StubLLM(latency=0.2, per_item=0.01) as stub:
+        model_api.GEMINI_API_URL = stub.url
+        elaboration_cache.ELABORATION_CACHE_PATH = ""
+        baseline = None
+        expected = None
+        for workers, batch_size in ((1, 1), (8, 1), (32, 1), (8, 10), (8, 25)):
+            stub.request_count = 0
+            start = time.perf_counter()
+            elaborations = model_api.elaborate_messages(MESSAGES, workers=workers, batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            expected = expected or elaborations
+            assert elaborations == expected, "output differs between configurations"
+            print(f"workers={workers:>2}  batch_size={batch_size:>2}  calls={stub.request_count:>3}"
+                  f"  {elapsed:6.2f}s  ({baseline / elapsed:.1f}x)")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            elaboration_cache.ELABORATION_CACHE_PATH = os.path.join(tmp, "elaborations.sqlite3")
+            elaboration_cache._cache = None
+            # A second, overlapping report window with a few repeated boilerplate messages
+            repeat = MESSAGES[50:] + [f"fix bug {i} in lexer" for i in range(50)] + ["Merge branch main"] * 20
+            for name, messages in (("first report", MESSAGES), ("overlapping report", repeat)):
+                stub.request_count = 0
+                start = time.perf_counter()
+                model_api.elaborate_messages(messages, workers=8)
+                elapsed = time.perf_counter() - start
+                print(f"cached, {name:<18}  calls={stub.request_count:>3}  {elapsed:6.2f}s")
+            print(f"cache: {elaboration_cache.get_elaboration_cache().stats()}")
+
+
+if __name__ == "__main__":
+    main()
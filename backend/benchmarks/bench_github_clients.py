@@ -0,0 +1,36 @@
+"""
+Connections opened by repeated reports of several users, each fetching with
+its own token, and what the client registry evicts when it holds fewer
+clients than there are users.
+
+    cd backend && python -m benchmarks.bench_github_clients
+"""
+import time
+
+from app.utils import github_api, github_cache, github_clients
+from benchmarks.github_stub import StubGitHub
+
+USERS = 4
+ROUNDS = 3
+
+
+def main():
+    github_cache.GITHUB_CACHE_PATH = ""  # measure the network path only
+    with StubGitHub(repos=10, commits_per_repo=10, latency=0.01) as stub:
+        github_api.GITHUB_API_URL = stub.url
+        for max_clients in (USERS, USERS // 2):
+            github_clients._registry = github_clients.GitHubClientRegistry(max_clients=max_clients)
+            for round_ in range(ROUNDS):
+                stub.request_count = stub.connection_count = 0
+                start = time.perf_counter()
+                for user in range(USERS):
+                    github_api.fetch_commits(f"token-{user}", "dev", "2025-01-01T00:00:00Z")
+                elapsed = time.perf_counter() - start
+                print(f"max_clients={max_clients}  round={round_ + 1}  requests={stub.request_count}"
+                      f"  connections={stub.connection_count}  {elapsed:.2f}s")
+            stats = github_clients.get_github_clients().stats()
+            print(f"registry: created={stats['created']}  reused={stats['reused']}  evictions={stats['evictions']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Wall-clock comparison of the GitHub fetch engine at different in-flight limits.
+
+    cd backend && python -m benchmarks.bench_github_fetch
+"""
+import time
+
+from app.utils import github_api, github_cache
+from benchmarks.github_stub import StubGitHub
+
+
+def main():
+    github_cache.GITHUB_CACHE_PATH = ""  # measure the network path only
+    with StubGitHub(repos=20, commits_per_repo=20, latency=0.02) as stub:
+        github_api.GITHUB_API_URL = stub.url
+        baseline = None
+        for max_in_flight in (1, 4, 16, 32):
+            stub.request_count = 0
+            start = time.perf_counter()
+            commits, status = github_api.fetch_commits("token", "dev", "2025-01-01T00:00:00Z", max_in_flight)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"max_in_flight={max_in_flight:>3}  commits={len(commits)}  requests={stub.request_count}"
+                  f"  {elapsed:.2f}s  ({baseline / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
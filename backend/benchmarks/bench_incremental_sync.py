@@ -0,0 +1,43 @@
+"""
+Repeat a report window with the commit store enabled and count how many
+GitHub requests the second, delta-only sync needs.
+
+    cd backend && python -m benchmarks.bench_incremental_sync
+"""
+import os
+import tempfile
+import time
+
+from app.utils import github_api, github_cache, github_graphql
+from app.utils.commit_store import CommitStore
+from benchmarks.github_stub import StubGitHub
+
+SINCE = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() - 90 * 24 * 3600))
+
+
+def timed(stub, stream, store):
+    stub.request_count = 0
+    start = time.perf_counter()
+    commits, status = stream("token", "dev", SINCE, store=store)
+    commits = list(commits)
+    return commits, stub.request_count, time.perf_counter() - start
+
+
+def main():
+    github_cache.GITHUB_CACHE_PATH = ""  # measure the network path only
+    for name, stream in (("rest", github_api.stream_commits), ("graphql", github_graphql.stream_commits_graphql)):
+        with tempfile.TemporaryDirectory() as tmp, \
+                StubGitHub(repos=10, commits_per_repo=300, latency=0.01) as stub:
+            github_api.GITHUB_API_URL = stub.url
+            store = CommitStore(os.path.join(tmp, "commits.sqlite3"))
+            first, first_requests, first_time = timed(stub, stream, store)
+            stub.new_commits = 3
+            second, second_requests, second_time = timed(stub, stream, store)
+            fresh, _, _ = timed(stub, stream, None)
+            assert second == fresh, "incremental result differs from a full fetch"
+            print(f"{name:<8} first sync: {len(first)} commits, {first_requests} requests, {first_time:.2f}s"
+                  f" | delta sync: {len(second)} commits, {second_requests} requests, {second_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Scaling of commit-pattern analysis (n-gram counts + bigram PMI) for 1k, 10k
+and 100k synthetic messages, against the original per-bigram PMI loop that
+rescanned every bigram count for each word, then exact against bounded
+(Space-Saving) frequency tables: peak memory and top-10 agreement. Messages
+are split on whitespace so the timings leave out NLTK tokenization.
+
+    cd backend && python -m benchmarks.bench_patterns
+"""
+import math
+import random
+import time
+import tracemalloc
+from collections import Counter
+
+from app.utils.collocations import NgramCounts
+
+VERBS = ["fix", "add", "remove", "update", "refactor", "bump", "rename", "handle", "merge", "revert"]
+OBJECTS = ["parser", "readme", "tests", "login", "report", "cache", "api", "docs", "pdf", "deps", "branch"]
+LEGACY_MAX_MESSAGES = 10_000  # the original loop takes minutes beyond this
+CAPACITIES = (0, 20_000, 2_000)  # 0 is exact
+MIN_COUNT = 20  # below this, top PMI is dominated by one-off n-grams no bounded table can keep
+
+
+def synthetic_messages(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} for {rng.choice(OBJECTS)} {rng.choice(OBJECTS)}{rng.randrange(count // 10 + 1)}"
+        for _ in range(count)
+    ]
+
+
+def legacy_top_bigrams(tokens):
+    bigram_counts = Counter(zip(tokens, tokens[1:]))
+    total = len(bigram_counts)
+    pmi = {}
+    for bigram, count in bigram_counts.items():
+        p_product = 1
+        for word in bigram:
+            p_product *= sum(c for ng, c in bigram_counts.items() if word in ng) / total
+        pmi[bigram] = math.log2((count / total) / p_product)
+    return sorted(pmi, key=pmi.get, reverse=True)[:10]
+
+
+def analyze(messages, capacity, min_count=1):
+    counts = NgramCounts(capacity=capacity)
+    for message in messages:
+        counts.update(message.split())
+    return counts.top_collocations(2, 10, min_count), counts.most_common(3, 5)
+
+
+def main():
+    for size in (1_000, 10_000, 100_000):
+        messages = synthetic_messages(size)
+
+        start = time.perf_counter()
+        analyze(messages, 0)
+        elapsed = time.perf_counter() - start
+
+        line = f"{size:>7} messages  vectorized {elapsed:7.3f}s"
+        if size <= LEGACY_MAX_MESSAGES:
+            tokens = [token for message in messages for token in message.split()]
+            start = time.perf_counter()
+            legacy_top_bigrams(tokens)
+            legacy = time.perf_counter() - start
+            line += f"  original {legacy:8.3f}s  ({legacy / elapsed:.0f}x)"
+        print(line)
+
+    messages = synthetic_messages(300_000)
+    exact = None
+    for capacity in CAPACITIES:
+        start = time.perf_counter()
+        bigrams, trigrams = analyze(iter(messages), capacity, MIN_COUNT)
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        analyze(iter(messages), capacity, MIN_COUNT)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        exact = exact or (bigrams, trigrams)
+        agree = len({b for b, _, _ in bigrams} & {b for b, _, _ in exact[0]})
+        agree_tri = len({t for t, _, _ in trigrams} & {t for t, _, _ in exact[1]})
+        print(f"300000 messages  capacity={capacity or 'exact':>6}  {elapsed:6.2f}s  peak={peak / 2 ** 20:7.1f} MB"
+              f"  top bigrams agree {agree}/10, top trigrams {agree_tri}/5")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Render time and peak memory of the server-side PDF report for synthetic
+reports of 100, 1,000 and 10,000 commits, rendered serially and on a pool
+of 4 workers. Each run is its own interpreter rendering into a fresh cache
+directory; peak RSS is reported for the rendering process and for its
+largest pool worker.
+
+    cd backend && python -m benchmarks.bench_pdf
+"""
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+CHILD = """
+import json, os, random, resource, sys, tempfile, time
+from app.utils import pdf_generator
+from app.utils.pdf_generator import render_report_pdf
+
+n = int(sys.argv[1])
+rng = random.Random(n)
+words = "fix add update refactor remove parser cache route token report test docs build config".split()
+languages = ["Python", "JavaScript", "TypeScript", "CSS", "HTML", "Go"]
+commits = [{
+    "repo": f"repo-{i % 5}",
+    "original": " ".join(rng.choices(words, k=6)),
+    "elaboration": " ".join(rng.choices(words, k=40)),
+    "date": f"2024-01-{i % 28 + 1:02d}T12:00:00Z",
+    "category": rng.choice(["feature", "bugfix", "refactor", "docs"]),
+    "additions": rng.randint(1, 400),
+    "deletions": rng.randint(0, 200),
+    "loc_per_language": {lang: {"estimated_additions": rng.randint(1, 200), "estimated_deletions": rng.randint(0, 80)}
+                         for lang in rng.sample(languages, 2)},
+} for i in range(n)]
+report = {"elaborated_commits": commits,
+          "summarization": [" ".join(rng.choices(words, k=20)) for _ in range(10)],
+          "analysis": {f"repo-{r}": " ".join(rng.choices(words, k=30)) for r in range(5)},
+          "patterns_analysis": {"top_bigrams": [{"bigram": "fix parser", "count": 12, "pmi": 3.2}]}}
+
+with tempfile.TemporaryDirectory() as cache_dir:
+    start = time.perf_counter()
+    path = render_report_pdf(report, cache_dir=cache_dir)
+    cold = time.perf_counter() - start
+    size = os.path.getsize(path)
+    start = time.perf_counter()
+    render_report_pdf(report, cache_dir=cache_dir)
+    cached = time.perf_counter() - start
+if pdf_generator._pool is not None:
+    pdf_generator._pool.shutdown()  # workers count towards RUSAGE_CHILDREN only once reaped
+print(json.dumps({"cold": cold, "cached": cached, "size_mb": size / 2 ** 20,
+                  "self_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                  "worker_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024}))
+"""
+
+SIZES = [100, 1000, 10000]
+WORKERS = [1, 4]
+
+
+def main():
+    for n in SIZES:
+        for workers in WORKERS:
+            env = dict(os.environ, PDF_WORKERS=str(workers))
+            output = subprocess.run([sys.executable, "-c", CHILD, str(n)], cwd=BACKEND_DIR, env=env, check=True,
+                                    capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{n:>6} commits  workers={workers}  render={result['cold']:7.2f}s"
+                  f"  cached={result['cached'] * 1000:6.1f}ms  pdf={result['size_mb']:6.2f} MB"
+                  f"  max_rss={result['self_rss_mb']:7.1f} MB  worker_max_rss={result['worker_rss_mb']:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Fetch through a stub server whose budget runs out mid-report and which
+throws secondary-limit 429s, and check the scheduler still delivers
+every commit.
+
+    cd backend && python -m benchmarks.bench_rate_limit
+"""
+import time
+
+from app.utils import github_api, github_cache, github_clients, rate_limit
+from benchmarks.github_stub import StubGitHub
+
+
+def main():
+    github_cache.GITHUB_CACHE_PATH = ""  # measure the network path only
+    with StubGitHub(repos=5, commits_per_repo=60, latency=0.01, rate_limit=150, reset_after=3,
+                    secondary_every=40) as stub:
+        github_api.GITHUB_API_URL = stub.url
+        start = time.perf_counter()
+        commits, status = github_api.fetch_commits("token", "dev", "2025-01-01T00:00:00Z")
+        elapsed = time.perf_counter() - start
+        expected = stub.repos * stub.commits_per_repo
+        scheduler = rate_limit.get_scheduler(github_clients.github_headers("token")["Authorization"], 0)
+        print(f"status={status}  commits={len(commits)}/{expected}  requests={stub.request_count}"
+              f"  limited={stub.limited_count}  {elapsed:.2f}s")
+        print(f"scheduler: {scheduler.stats()}")
+        missing = sum(1 for commit in commits if commit["additions"] == 0)
+        print(f"commits missing stats: {missing}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Boot time and peak memory of a fresh backend process: importing the report
+controller, then create_app(), with and without warming the models up front.
+Each configuration runs in its own interpreter so nothing is already loaded.
+
+    cd backend && python -m benchmarks.bench_startup
+"""
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+CHILD = """
+import json, resource, time
+start = time.perf_counter()
+import app.controllers.report_controller
+imported = time.perf_counter() - start
+from app import create_app
+create_app()
+booted = time.perf_counter() - start
+print(json.dumps({"import": imported, "boot": booted,
+                  "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+"""
+
+# (label, WARM_UP_MODELS)
+CONFIGS = [
+    ("lazy (default)", ""),
+    ("warm nltk", "nltk"),
+    ("warm nltk,spacy", "nltk,spacy"),
+]
+
+
+def main():
+    for label, warm_up in CONFIGS:
+        env = dict(os.environ, WARM_UP_MODELS=warm_up)
+        output = subprocess.run([sys.executable, "-c", CHILD], cwd=BACKEND_DIR, env=env, check=True,
+                                capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{label:<18} import={result['import']:6.2f}s  boot={result['boot']:6.2f}s"
+              f"  max_rss={result['max_rss_mb']:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+CPU throughput of T5 elaboration (commits/sec) for batch size, beam width
+and dynamic int8 quantization settings. Downloads t5-small on first run.
+
+    cd backend && python -m benchmarks.bench_t5
+"""
+import time
+
+from app.utils.t5_worker import load_model, generate_batched
+
+MESSAGES = [
+    "fix typo in README",
+    "add OAuth login flow for GitHub users",
+    "refactor report controller to stream commits",
+    "bump dependencies",
+    "handle empty repositories when listing commits",
+    "Merge branch 'main' into feature/pdf-export",
+    "remove unused imports",
+    "add unit conversion helpers and tests for the parser module",
+] * 8
+
+# (label, batch_size, num_beams, quantize); the first row is the original per-commit loop
+CONFIGS = [
+    ("per-commit, beams=4", 1, 4, False),
+    ("batch=16, beams=4", 16, 4, False),
+    ("batch=16, beams=2", 16, 2, False),
+    ("batch=16, greedy", 16, 1, False),
+    ("batch=32, greedy", 32, 1, False),
+    ("batch=16, greedy, int8", 16, 1, True),
+]
+
+
+def main():
+    models = {}
+    for label, batch_size, num_beams, quantize in CONFIGS:
+        if quantize not in models:
+            models[quantize] = load_model(quantize=quantize)
+        tokenizer, model = models[quantize]
+        generate_batched(tokenizer, model, MESSAGES[:2], batch_size, num_beams)  # warm-up
+        start = time.perf_counter()
+        generate_batched(tokenizer, model, MESSAGES, batch_size, num_beams)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<24} {len(MESSAGES) / elapsed:7.1f} commits/s  ({elapsed:.2f}s for {len(MESSAGES)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Payload size and encode/decode time of a 10,000-commit list and its report,
+in the full and compact forms, with the stdlib json module, orjson and
+MessagePack (when installed), uncompressed and gzip/brotli compressed.
+
+    cd backend && python -m benchmarks.bench_wire
+"""
+import gzip
+import json
+import random
+import time
+
+from app.utils import wire
+from app.utils.github_api import build_commit
+
+COMMITS = 10000
+REPOS = 25
+LANGUAGES = ["Python", "JavaScript", "TypeScript", "HTML", "CSS", "Shell", "Go", "Dockerfile"]
+
+
+def synthetic_commits(rng):
+    repos = []
+    for r in range(REPOS):
+        languages = rng.sample(LANGUAGES, rng.randint(2, 6))
+        weights = [rng.random() for _ in languages]
+        repos.append((f"repo-{r}", {lang: round(100 * w / sum(weights), 2) for lang, w in zip(languages, weights)}))
+    commits = []
+    for i in range(COMMITS):
+        name, languages = rng.choice(repos)
+        message = " ".join(rng.choices(["fix", "add", "update", "parser", "cache", "route", "tests", "docs"], k=8))
+        commits.append(build_commit(message, f"2024-01-{i % 28 + 1:02d}T12:00:00Z", name, languages,
+                                    rng.randint(0, 500), rng.randint(0, 200)))
+    return commits
+
+
+def synthetic_report(rng, commits):
+    return {
+        "elaborated_commits": [dict(original=c["message"], elaboration=f"This commit {c['message']} " * 3,
+                                    **{k: c[k] for k in ("repo", "date", "additions", "deletions",
+                                                         "language_distribution", "loc_per_language")},
+                                    category=rng.choice(["New Features", "Testing/Debugging"])) for c in commits],
+        "summarization": ["A summary sentence."] * 10,
+        "analysis": {f"repo-{r}": "Style analysis." for r in range(REPOS)},
+        "patterns_analysis": {},
+    }
+
+
+def timed(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def codecs():
+    yield "json", lambda data: json.dumps(data).encode(), json.loads
+    if wire.orjson is not None:
+        yield "orjson", wire.orjson.dumps, wire.orjson.loads
+    if wire.msgpack is not None:
+        yield "msgpack", wire.msgpack.packb, wire.msgpack.unpackb
+
+
+def measure(label, full, compact_fn, expand_fn):
+    # Compacting and expanding count towards the compact form's encode and decode times
+    compact, compact_time = timed(lambda: compact_fn(full))
+    _, expand_time = timed(lambda: expand_fn(compact))
+    forms = (("full", full, 0, 0), ("compact", compact, compact_time, expand_time))
+    for form, data, extra_encode, extra_decode in forms:
+        for codec, encode, decode in codecs():
+            body, encode_time = timed(lambda: encode(data))
+            _, decode_time = timed(lambda: decode(body))
+            encode_time += extra_encode
+            decode_time += extra_decode
+            sizes = f"raw={len(body) / 2 ** 20:6.2f} MB  gzip={len(gzip.compress(body, 6)) / 2 ** 20:5.2f} MB"
+            if wire.brotli is not None:
+                sizes += f"  br={len(wire.brotli.compress(body, quality=5)) / 2 ** 20:5.2f} MB"
+            print(f"{label:<8} {form:<8} {codec:<8} {sizes}  encode={encode_time * 1000:7.1f}ms"
+                  f"  decode={decode_time * 1000:7.1f}ms")
+
+
+def main():
+    rng = random.Random(0)
+    commits = synthetic_commits(rng)
+    measure("commits", commits, wire.compact_commits, wire.expand_commits)
+    measure("report", synthetic_report(rng, commits), wire.compact_report, wire.expand_report)
+
+
+if __name__ == "__main__":
+    main()
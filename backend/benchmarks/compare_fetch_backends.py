@@ -0,0 +1,35 @@
+"""
+Compare how many requests and how long the REST and GraphQL fetch backends
+take for the same history. tests/test_fetch_backends.py checks that their
+output is identical.
+
+    cd backend && python -m benchmarks.compare_fetch_backends
+"""
+import time
+
+from app.utils import github_api, github_cache, github_graphql
+from benchmarks.github_stub import StubGitHub
+
+
+def run(stub, stream):
+    stub.request_count = 0
+    start = time.perf_counter()
+    commits, status = stream("token", "dev", "2025-01-01T00:00:00Z")
+    commits = list(commits)
+    return commits, status, stub.request_count, time.perf_counter() - start
+
+
+def main():
+    github_cache.GITHUB_CACHE_PATH = ""  # measure the network path only
+    with StubGitHub(repos=25, commits_per_repo=230, latency=0.02) as stub:
+        github_api.GITHUB_API_URL = stub.url
+        rest = run(stub, github_api.stream_commits)
+        graphql = run(stub, github_graphql.stream_commits_graphql)
+
+        for name, (commits, status, requests, elapsed) in (("rest", rest), ("graphql", graphql)):
+            print(f"{name:<8} status={status}  commits={len(commits)}  requests={requests}  {elapsed:.2f}s")
+        print("outputs identical" if rest[0] == graphql[0] else "outputs differ")
+
+
+if __name__ == "__main__":
+    main()
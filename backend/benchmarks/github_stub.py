@@ -0,0 +1,215 @@
+"""Local stand-in for the parts of the GitHub REST API the backend uses."""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+
+class StubGitHub:
+    """
+    Serves repos, languages, paginated commit lists and commit details.
+
+    With `rate_limit` set it emits `X-RateLimit-*` headers and answers 403
+    once the window's budget is spent (conditional requests are free, as on
+    GitHub); `secondary_every` makes every Nth request a 429 secondary limit.
+    """
+
+    def __init__(self, repos=20, commits_per_repo=20, latency=0.02, rate_limit=None, reset_after=5,
+                 secondary_every=None):
+        self.repos = repos
+        self.commits_per_repo = commits_per_repo
+        self.new_commits = 0
+        self.epoch = time.time() - 60
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.reset_after = reset_after
+        self.secondary_every = secondary_every
+        self.remaining = rate_limit
+        self.reset_at = time.time() + reset_after
+        self.request_count = 0
+        self.connection_count = 0
+        self.not_modified_count = 0
+        self.limited_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    LANGUAGES = {"Python": 7000, "JavaScript": 2500, "HTML": 500}
+
+    def commits(self, repo, since=None):
+        """Commits of a repo, newest first, one hour apart; `new_commits` more are pushed on top."""
+        commits = []
+        for i in range(-self.new_commits, self.commits_per_repo):
+            date = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.epoch - i * 3600))
+            if since and date < since[:19] + "Z":
+                break
+            commits.append({
+                "sha": f"{repo}.{i}",
+                "message": f"fix bug {i} in {repo}",
+                "date": date,
+                "additions": 10 + i % 7,
+                "deletions": i % 5
+            })
+        return commits
+
+    def route(self, path, query):
+        parts = path.strip("/").split("/")
+        if parts == ["user", "repos"]:
+            return [{"name": f"repo{i}", "owner": {"login": "dev"}} for i in range(self.repos)]
+        if len(parts) == 4 and parts[3] == "languages":
+            return dict(self.LANGUAGES)
+        if len(parts) == 4 and parts[3] == "commits":
+            return [
+                {
+                    "sha": commit["sha"],
+                    "url": f"{self.url}/repos/dev/{parts[2]}/commits/{commit['sha']}",
+                    "commit": {"message": commit["message"], "committer": {"date": commit["date"]}}
+                }
+                for commit in self.commits(parts[2], query.get("since", [None])[0])
+            ]
+        if len(parts) == 5 and parts[3] == "commits":
+            repo, i = parts[4].rsplit(".", 1)
+            commit = self.commits(repo)[int(i) + self.new_commits]
+            return {"sha": commit["sha"], "stats": {"additions": commit["additions"], "deletions": commit["deletions"]}}
+        return None
+
+    def graphql(self, query, variables):
+        """Answers the user lookup and aliased `history` queries of `github_graphql`."""
+        if "login" in variables:
+            return {"data": {"user": {"id": "U_dev"} if variables["login"] == "dev" else None}}
+        data = {}
+        alias = 0
+        while f"owner{alias}" in variables:
+            commits = self.commits(variables[f"name{alias}"], variables.get(f"since{alias}"))
+            offset = int(variables.get(f"after{alias}") or 0)
+            end = min(offset + 100, len(commits))
+            data[f"r{alias}"] = {
+                "languages": {"edges": [{"size": size, "node": {"name": name}}
+                                        for name, size in self.LANGUAGES.items()]},
+                "defaultBranchRef": {"target": {"history": {
+                    "pageInfo": {"hasNextPage": end < len(commits), "endCursor": str(end)},
+                    "nodes": [
+                        {"oid": commit["sha"], "message": commit["message"], "committedDate": commit["date"],
+                         "additions": commit["additions"], "deletions": commit["deletions"]}
+                        for commit in commits[offset:end]
+                    ]
+                }}}
+            }
+            alias += 1
+        return {"data": data}
+
+    def take_budget(self, conditional):
+        """Rate-limit headers for the next response and the error status to answer with, if any."""
+        if self.secondary_every and self.request_count % self.secondary_every == 0:
+            self.limited_count += 1
+            return {"Retry-After": "1"}, 429
+        if self.rate_limit is None:
+            return {}, None
+        now = time.time()
+        if now >= self.reset_at:
+            self.remaining = self.rate_limit
+            self.reset_at = now + self.reset_after
+        limited = None
+        if self.remaining == 0:
+            self.limited_count += 1
+            limited = 403
+        elif not conditional:
+            self.remaining -= 1
+        return {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(int(self.reset_at))
+        }, limited
+
+    def paginate(self, items, url):
+        query = parse_qs(url.query)
+        per_page = int(query.get("per_page", ["30"])[0])
+        page = int(query.get("page", ["1"])[0])
+        link = None
+        if page * per_page < len(items):
+            query["page"] = [str(page + 1)]
+            link = f'<{self.url}{url.path}?{urlencode(query, doseq=True)}>; rel="next"'
+        return items[(page - 1) * per_page:page * per_page], link
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            wbufsize = -1  # send headers and body in one write
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connection_count += 1
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.request_count += 1
+                    limit_headers, limited = stub.take_budget(self.headers.get("If-None-Match"))
+                time.sleep(stub.latency)
+                if limited:
+                    self.respond(limited, json.dumps({"message": "API rate limit exceeded"}).encode(), limit_headers)
+                    return
+
+                url = urlparse(self.path)
+                payload = stub.route(url.path, parse_qs(url.query))
+                link = None
+                if isinstance(payload, list):
+                    payload, link = stub.paginate(payload, url)
+                body = json.dumps(payload if payload is not None else {"message": "Not Found"}).encode()
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                headers = dict(limit_headers, ETag=etag)
+                if link:
+                    headers["Link"] = link
+                if payload is not None and self.headers.get("If-None-Match") == etag:
+                    with stub._lock:
+                        stub.not_modified_count += 1
+                    self.respond(304, b"", headers)
+                    return
+                self.respond(200 if payload is not None else 404, body, headers)
+
+            def do_POST(self):
+                with stub._lock:
+                    stub.request_count += 1
+                    limit_headers, limited = stub.take_budget(None)
+                time.sleep(stub.latency)
+                if limited:
+                    self.respond(limited, json.dumps({"message": "API rate limit exceeded"}).encode(), limit_headers)
+                    return
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                if urlparse(self.path).path != "/graphql":
+                    self.respond(404, json.dumps({"message": "Not Found"}).encode(), limit_headers)
+                    return
+                body = json.dumps(stub.graphql(payload["query"], payload.get("variables") or {})).encode()
+                self.respond(200, body, limit_headers)
+
+            def respond(self, status, body, headers):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
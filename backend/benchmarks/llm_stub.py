@@ -0,0 +1,70 @@
+"""Local stand-in for the Gemini generateContent endpoint."""
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubLLM:
+    """
+    Answers single-commit prompts with a canned explanation and batch prompts
+    with a JSON array. Each call takes `latency` plus `per_item` for every
+    commit explained, roughly how output length drives real latency.
+    """
+
+    def __init__(self, latency=0.2, per_item=0.01):
+        self.latency = latency
+        self.per_item = per_item
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1beta/models/stub:generateContent"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def answer(self, prompt):
+        batch = re.search(r"JSON array of exactly (\d+) strings", prompt)
+        if batch is None:
+            message = prompt.split(": ", 1)[-1]
+            return f"This commit ({message}) changes the code as described.", 1
+        messages = [json.loads(line.split(". ", 1)[1]) for line in prompt.splitlines() if re.match(r"\d+\. ", line)]
+        return json.dumps([f"This commit ({message}) changes the code as described." for message in messages]), \
+            len(messages)
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            wbufsize = -1  # send headers and body in one write
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                with stub._lock:
+                    stub.request_count += 1
+                text, items = stub.answer(payload["contents"][0]["parts"][0]["text"])
+                time.sleep(stub.latency + stub.per_item * items)
+                body = json.dumps({"candidates": [{"content": {"parts": [{"text": text}]}}]}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,74 @@
+import json
+import os
+import threading
+from urllib.parse import parse_qsl, urlsplit, urlunsplit
+
+import pytest
+import requests
+
+from app.utils import github_api, github_cache, github_clients
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def request_key(method, url, params=None, variables=None):
+    """Recorded requests match on method, URL and query (Link URLs carry theirs inline), or GraphQL variables."""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query) + [(name, str(value)) for name, value in (params or {}).items()]
+    return (method, urlunsplit((parts.scheme, parts.netloc, parts.path, "", "")), tuple(sorted(query)),
+            json.dumps(variables, sort_keys=True))
+
+
+def encode_body(body):
+    return json.dumps(body).encode()
+
+
+class ReplaySession:
+    """
+    Stands in for the GitHub client's requests session, answering from
+    recorded interactions. Later fixture files override earlier ones for the
+    same request; a request nothing was recorded for fails the test.
+    """
+
+    def __init__(self, *fixtures):
+        self.interactions = {}
+        for fixture in fixtures:
+            with open(os.path.join(FIXTURES_DIR, "github", fixture)) as f:
+                for interaction in json.load(f):
+                    recorded = interaction["request"]
+                    key = request_key(recorded["method"], recorded["url"], recorded.get("params"),
+                                      recorded.get("variables"))
+                    self.interactions[key] = interaction["response"]
+        self.requested = set()
+        self._lock = threading.Lock()
+
+    def request(self, method, url, params=None, json=None, headers=None):
+        key = request_key(method, url, params, (json or {}).get("variables"))
+        if key not in self.interactions:
+            raise AssertionError(f"No recorded response for {key}")
+        with self._lock:
+            self.requested.add(key)
+        recorded = self.interactions[key]
+        response = requests.Response()
+        response.status_code = recorded["status"]
+        response.url = url
+        response.headers.update(recorded.get("headers", {}))
+        response._content = encode_body(recorded["body"])
+        return response
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def replay_github(monkeypatch):
+    """`replay_github(*fixture_files)` routes GitHub requests to a ReplaySession and returns it."""
+    monkeypatch.setattr(github_api, "GITHUB_API_URL", "https://api.github.com")
+    monkeypatch.setattr(github_cache, "GITHUB_CACHE_PATH", "")
+    monkeypatch.setattr(github_clients, "_registry", github_clients.GitHubClientRegistry())
+
+    def replay(*fixtures):
+        session = ReplaySession(*fixtures)
+        monkeypatch.setattr(github_clients, "new_session", lambda pool_size: session)
+        return session
+    return replay
@@ -0,0 +1,61 @@
+"""
+The REST and GraphQL fetch backends, replayed against recorded GitHub
+responses: repos over two pages, a commit listing over two pages (a history
+over two cursors in GraphQL), an empty repo (409 over REST, no default branch
+in GraphQL), an unknown author, and a GraphQL batch that fails mid-history.
+"""
+from app.utils.commit_store import CommitStore
+from app.utils.github_api import stream_commits
+from app.utils.github_graphql import stream_commits_graphql
+
+SINCE = "2025-01-01T00:00:00Z"
+
+
+def fetch(stream, username="octo", store=None):
+    commits, status_code = stream("token", username, SINCE, store=store)
+    assert status_code == 200
+    return list(commits)
+
+
+def test_rest_follows_pagination(replay_github):
+    replay_github("rest.json")
+    commits = fetch(stream_commits)
+
+    assert [(c["repo"], c["message"].splitlines()[0]) for c in commits] == [
+        ("alpha", "Add retry to the config loader"),
+        ("alpha", "Fix typo in README"),
+        ("alpha", "Handle empty config files"),
+        ("beta", "Migrate build to Vite"),
+    ]
+    assert commits[0]["additions"] == 42 and commits[0]["deletions"] == 7
+    assert commits[0]["language_distribution"] == {"Python": 80.0, "Shell": 20.0}
+    assert commits[0]["loc_per_language"]["Python"] == {"estimated_additions": 34, "estimated_deletions": 6}
+
+
+def test_backends_return_identical_commits(replay_github):
+    session = replay_github("rest.json", "graphql.json")
+    rest = fetch(stream_commits)
+    graphql = fetch(stream_commits_graphql)
+
+    assert graphql == rest
+    # The author lookup, then two history rounds: alpha's second page needs its own
+    assert sum(1 for key in session.requested if key[1].endswith("/graphql")) == 3
+
+
+def test_unknown_author_yields_nothing(replay_github):
+    replay_github("rest.json", "graphql.json")
+
+    assert fetch(stream_commits, "nobody") == []
+    assert fetch(stream_commits_graphql, "nobody") == []
+
+
+def test_failed_batch_keeps_what_was_fetched(replay_github):
+    replay_github("rest.json", "graphql.json", "graphql_failed_batch.json")
+    rest = fetch(stream_commits)
+    store = CommitStore(":memory:")
+    graphql = fetch(stream_commits_graphql, store=store)
+
+    # The failed second round cut alpha's history short; beta came in the first round
+    assert graphql == [c for c in rest if c["message"] != "Handle empty config files"]
+    assert store.fetch_since("octo", "octo/alpha", SINCE) == SINCE
+    assert store.fetch_since("octo", "octo/beta", SINCE) > SINCE
@@ -0,0 +1,30 @@
+import pytest
+from textblob import TextBlob
+from textblob.en import sentiment
+
+from app.utils.text_analysis import features_from_tokens
+
+CORPUS = [
+    "Refactor the parser to be extremely fast and clean.",
+    "Fix a really bad bug in the cache layer",
+    "This is not a good fix, revert it",
+    "Really not good: the build is broken again!",
+    "Add very very useful logging!!",
+    "Never use the old API, it is extremely slow and terribly unreliable",
+    "Make error messages more helpful and less confusing",
+    "no longer crash on empty input",
+    "Merge branch 'main' into feature/login",
+    "Update README",
+    "",
+]
+
+
+def test_sentiment_matches_textblob():
+    # TextBlob's own tokenization, so only the scoring is compared
+    token_lists = [" ".join(sentiment.tokenizer(text)).split() for text in CORPUS]
+    features = features_from_tokens(token_lists, [["NN"] * len(tokens) for tokens in token_lists])
+
+    for text, polarity, subjectivity in zip(CORPUS, features["polarity"], features["subjectivity"]):
+        expected = TextBlob(text).sentiment
+        assert polarity == pytest.approx(expected.polarity), text
+        assert subjectivity == pytest.approx(expected.subjectivity), text
@@ -27,8 +27,10 @@ function Report() {
       return;
     }
     setLoading(true);
+    const token = localStorage.getItem("auth_token");
     fetch(
-      `http://localhost:5000/report/commit?duration=${duration}&username=${username}`
+      `http://localhost:5000/report/commit?duration=${duration}&username=${username}`,
+      { headers: token ? { Authorization: `Bearer ${token}` } : {} }
     )
       .then((response) => response.json())
       .then((data) => {